@@ -1,9 +1,11 @@
 # app.py - Python backend with Vikas features
-from flask import Flask, render_template, request, send_file, redirect, url_for
+from flask import Flask, Request, Response, render_template, request, send_file, redirect
 import os
-from moviepy.editor import VideoFileClip
-import uuid
+import subprocess
+import secrets
 from datetime import datetime
+from urllib.parse import quote
+from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
 
@@ -12,6 +14,29 @@ app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['PROCESSED_FOLDER'] = 'processed'
 app.config['ALLOWED_EXTENSIONS'] = {'mp4', 'mov', 'avi', 'mkv'}
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB
+app.config['TRIM_PRESET'] = 'ultrafast'  # libx264 preset for frame-accurate trims
+
+# Vikas Feature: Set to an nginx internal location (e.g. '/processed/') to let
+# nginx serve downloads itself via X-Accel-Redirect. Otherwise send_file hands the file
+# to the server's wsgi.file_wrapper, which gunicorn serves with sendfile(2).
+app.config['X_ACCEL_PREFIX'] = None
+
+# Vikas Feature: Stream uploaded files straight to their final location. Werkzeug
+# would otherwise spool large uploads to /tmp and save() would copy them again.
+class VikasRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+        name = f"vikas_{secrets.token_hex(16)}_{secure_filename(filename or '')}"
+        return open(os.path.join(app.config['UPLOAD_FOLDER'], name), 'wb+')
+
+app.request_class = VikasRequest
+
+# Vikas Feature: Delete an upload that was rejected
+def discard_upload(upload_path):
+    try:
+        os.remove(upload_path)
+    except OSError:
+        pass
 
 # Vikas Feature: Create necessary directories
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -22,6 +47,31 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+# Vikas Feature: Build FFmpeg trim command
+def build_trim_command(input_path, output_path, start_time, end_time, frame_accurate=False):
+    # -ss before -i seeks straight to the keyframe before start_time
+    cmd = [
+        'ffmpeg', '-y',
+        '-ss', str(start_time),
+        '-i', input_path,
+        '-t', str(end_time - start_time)
+    ]
+    if frame_accurate:
+        # Re-encode video only when the user asks for exact cut points
+        cmd += ['-c:v', 'libx264', '-preset', app.config['TRIM_PRESET'],
+                '-threads', str(os.cpu_count() or 1), '-c:a', 'copy']
+    else:
+        # Remux without decoding; cuts land on the nearest keyframe
+        cmd += ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+    cmd += ['-movflags', '+faststart', output_path]
+    return cmd
+
+# Vikas Feature: Reject oversized uploads before any of the body is read
+@app.before_request
+def check_content_length():
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return "Vikas Error: File too large", 413
+
 # Vikas Feature: Main route
 @app.route('/')
 def index():
@@ -38,44 +88,60 @@ def process_video():
     
     video_file = request.files['video']
     
+    # The body is already on disk at its final path (see VikasRequest)
+    upload_path = video_file.stream.name
+    filename = os.path.basename(upload_path)
+    video_file.stream.close()
+    
     # Check if file is selected
     if video_file.filename == '':
+        discard_upload(upload_path)
         return redirect(request.url)
     
     # Check if file is allowed
     if video_file and allowed_file(video_file.filename):
-        # Generate unique filename
-        filename = f"vikas_{uuid.uuid4().hex}_{video_file.filename}"
-        upload_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        video_file.save(upload_path)
-        
         # Get start and end times
-        start_time = float(request.form['start_time'])
-        end_time = float(request.form['end_time'])
+        try:
+            start_time = float(request.form['start_time'])
+            end_time = float(request.form['end_time'])
+        except (KeyError, ValueError):
+            discard_upload(upload_path)
+            return redirect(request.url)
         
         # Process video
         output_filename = f"vikas_trimmed_{filename}"
         output_path = os.path.join(app.config['PROCESSED_FOLDER'], output_filename)
         
-        # Vikas Feature: Video trimming
+        # Vikas Feature: Video trimming using FFmpeg stream copy
         try:
-            with VideoFileClip(upload_path) as video:
-                trimmed = video.subclip(start_time, end_time)
-                trimmed.write_videofile(output_path, codec='libx264', audio_codec='aac')
+            frame_accurate = request.form.get('frame_accurate') in ('1', 'true', 'on')
+            subprocess.run(build_trim_command(upload_path, output_path,
+                                              start_time, end_time, frame_accurate),
+                           check=True)
         except Exception as e:
+            discard_upload(upload_path)
             return f"Vikas Error: Video processing failed - {str(e)}"
         
         return render_template('index.html', 
                                video_file=output_filename,
                                current_year=datetime.now().year)
     
+    discard_upload(upload_path)
     return redirect(request.url)
 
 # Vikas Feature: Download route
 @app.route('/download/<filename>')
 def download_file(filename):
+    accel_prefix = app.config['X_ACCEL_PREFIX']
+    if accel_prefix:
+        response = Response(mimetype='application/octet-stream')
+        response.headers['X-Accel-Redirect'] = accel_prefix + quote(filename)
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+        return response
     return send_file(os.path.join(app.config['PROCESSED_FOLDER'], filename),
                      as_attachment=True)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; in production run under gunicorn, e.g.
+    #   gunicorn -w $(nproc) -k gevent --timeout 600 app:app
+    app.run()
\ No newline at end of file
@@ -1,9 +1,14 @@
+import asyncio
+import functools
 import os
+import secrets
 import shutil
+import subprocess
 import uuid
 import logging
+import weakref
 from typing import Dict, Optional
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Request
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 import ffmpeg
@@ -43,9 +48,115 @@ class Config:
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
+
+        # Put the moov atom first so playback can start before the download ends.
+        # Use 'frag_keyframe+empty_moov+default_base_moof' for fragmented mp4 that
+        # can be streamed while it is still being encoded.
+        self.MP4_MOVFLAGS = '+faststart'
+
+        # 'fused' decodes once for all outputs; 'parallel' runs one FFmpeg per
+        # output, at most FFMPEG_CONCURRENCY at a time across all jobs
+        self.PIPELINE_MODE = 'fused'
+        self.PARALLEL_STAGES = 3  # enhanced, audio and short run side by side
+
+        # CPU encoder (libx264, libsvtav1) tuning: one encoder thread per vCPU,
+        # shared between the stages of a job in 'parallel' mode
+        cpu_count = os.cpu_count() or 1
+        self.X264_PRESET = 'veryfast'
+        self.FFMPEG_THREADS = cpu_count
+        if self.PIPELINE_MODE == 'parallel':
+            self.FFMPEG_THREADS = max(1, cpu_count // self.PARALLEL_STAGES)
+
+        self.VAAPI_DEVICE = '/dev/dri/renderD128'
+
+        # Probe FFmpeg once at startup; request handlers only branch on these
+        # flags and never spawn ffmpeg just to check support
+        encoders = self._list_encoders()
+        self.HW_ENCODER = self._detect_encoder(encoders)
+        self.HAS_NVENC = self.HW_ENCODER == 'h264_nvenc'
+        self.HAS_QSV = self.HW_ENCODER == 'h264_qsv'
+        self.HAS_VAAPI = self.HW_ENCODER == 'h264_vaapi'
+        self.HAS_SVTAV1 = 'libsvtav1' in encoders
+
+        # Enhanced output codec; SVT-AV1 gives smaller files than x264 at similar speed
+        self.ENHANCED_CODEC = 'libsvtav1' if self.HAS_SVTAV1 else self.HW_ENCODER
+
+        # CPU encoder threads only bound the cap when a CPU encoder actually
+        # runs; hardware encoders leave the vCPUs to other FFmpeg processes
+        if {'libx264', 'libsvtav1'} & {self.HW_ENCODER, self.ENHANCED_CODEC}:
+            self.FFMPEG_CONCURRENCY = max(1, cpu_count // self.FFMPEG_THREADS)
+        else:
+            self.FFMPEG_CONCURRENCY = cpu_count
+
+    def _list_encoders(self) -> str:
+        """Return the output of `ffmpeg -encoders`, or an empty string if FFmpeg is missing"""
+        try:
+            result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                    capture_output=True, text=True)
+            return result.stdout
+        except Exception:
+            return ''
+
+    def _encoder_works(self, encoder: str) -> bool:
+        """Encode one test frame; `-encoders` lists what FFmpeg was built with, not the hardware present"""
+        args = ['ffmpeg', '-hide_banner', '-loglevel', 'error']
+        if encoder == 'h264_vaapi':
+            args += ['-vaapi_device', self.VAAPI_DEVICE]
+        args += ['-f', 'lavfi', '-i', 'nullsrc=s=64x64', '-frames:v', '1']
+        if encoder == 'h264_vaapi':
+            args += ['-vf', 'format=nv12,hwupload']
+        args += ['-c:v', encoder, '-f', 'null', '-']
+        try:
+            return subprocess.run(args, capture_output=True, timeout=30).returncode == 0
+        except Exception:
+            return False
+
+    def _detect_encoder(self, encoders: str) -> str:
+        """Return the first hardware encoder that works here: NVENC, then QSV, then VAAPI, else libx264"""
+        for encoder in ('h264_nvenc', 'h264_qsv', 'h264_vaapi'):
+            if encoder in encoders and self._encoder_works(encoder):
+                return encoder
+        return 'libx264'
         
 config = Config()
 logger = logging.getLogger("VikasAI")
+logger.info(f"Using video encoder: {config.HW_ENCODER}, enhanced codec: {config.ENHANCED_CODEC}")
+
+# Encoder-specific rate control, tuned to roughly match libx264 crf=23
+ENCODER_ARGS = {
+    'h264_nvenc': {'preset': 'p4', 'rc': 'vbr', 'cq': 23},
+    'h264_qsv': {'global_quality': 23},
+    'h264_vaapi': {'qp': 23},
+    'libx264': {
+        'preset': config.X264_PRESET,
+        'crf': 23,
+        'threads': config.FFMPEG_THREADS,
+        # Shorter lookahead keeps latency down on short clips
+        'x264-params': 'aq-mode=0:rc-lookahead=10'
+    },
+    # Preset 10 favours throughput; crf 32 is close to x264 crf 23 at a lower bitrate
+    # lp caps SVT-AV1's thread pool, which otherwise takes every core
+    'libsvtav1': {
+        'preset': 10,
+        'crf': 32,
+        'threads': config.FFMPEG_THREADS,
+        'svtav1-params': f'tune=0:film-grain=0:lp={config.FFMPEG_THREADS}'
+    },
+}
+
+# Decode on the same device that encodes
+HWACCEL_ARGS = {
+    'h264_nvenc': {'hwaccel': 'cuda'},
+    'h264_qsv': {'hwaccel': 'qsv'},
+    'h264_vaapi': {'hwaccel': 'vaapi', 'vaapi_device': config.VAAPI_DEVICE},
+    'libx264': {},
+}
+
+def hw_upload(video, encoder: str):
+    """VAAPI encoders only accept frames in GPU memory"""
+    if encoder == 'h264_vaapi':
+        return video.filter('format', 'nv12').filter('hwupload')
+    return video
 
 class VideoProcessor:
     def __init__(self, input_path: str):
@@ -62,39 +173,123 @@ class VideoProcessor:
             except Exception as e:
                 logger.warning(f"Failed to remove temp file {file}: {str(e)}")
 
+    @staticmethod
+    def _input(input_path: str):
+        return ffmpeg.input(input_path, **HWACCEL_ARGS[config.HW_ENCODER])
+
+    @staticmethod
+    def _enhance(video, options: Dict):
+        """Apply the enabled enhancement filters to a video stream"""
+        # Basic enhancement filters
+        if options.get('denoise'):
+            video = video.filter('hqdn3d', 1.5, 1.5, 6, 6)
+        if options.get('sharpen'):
+            video = video.filter('unsharp', 5, 5, 0.8, 3, 3, 0.4)
+        if options.get('color_correct'):
+            video = video.filter('eq', contrast=1.05, brightness=0.02, saturation=1.05)
+        
+        return video
+
+    @staticmethod
+    def _enhanced_output(video, audio, output_path: str, options: Dict, **kwargs):
+        """Build the enhanced-video output node"""
+        return ffmpeg.output(
+            hw_upload(VideoProcessor._enhance(video, options), config.ENHANCED_CODEC),
+            audio,
+            output_path,
+            vcodec=config.ENHANCED_CODEC,
+            acodec='aac',
+            audio_bitrate='192k',
+            movflags=config.MP4_MOVFLAGS,
+            **ENCODER_ARGS[config.ENHANCED_CODEC],
+            **kwargs
+        )
+
+    @staticmethod
+    def _audio_output(audio, output_path: str, format: str = 'mp3'):
+        """Build the extracted-audio output node"""
+        return ffmpeg.output(
+            audio,
+            output_path,
+            acodec='libmp3lame' if format == 'mp3' else 'aac',
+            audio_bitrate='192k'
+        )
+
+    @staticmethod
+    def _short_output(video, output_path: str, duration: int):
+        """Build the short-clip output node"""
+        return ffmpeg.output(
+            hw_upload(video.trim(start=0, duration=duration), config.HW_ENCODER),
+            output_path,
+            vcodec=config.HW_ENCODER,
+            movflags=config.MP4_MOVFLAGS,
+            **ENCODER_ARGS[config.HW_ENCODER]
+        )
+
+    @staticmethod
+    def _replace_audio_output(video, audio_path: str, output_path: str):
+        """Build the voice-replaced output node (video is stream-copied)"""
+        audio_input = ffmpeg.input(audio_path)
+        return ffmpeg.output(
+            video,
+            audio_input.audio,
+            output_path,
+            vcodec='copy',
+            acodec='aac',
+            shortest=None,
+            movflags=config.MP4_MOVFLAGS
+        )
+
+    async def process(self, outputs: Dict[str, str], options: Dict,
+                      short_duration: Optional[int] = None,
+                      voice_path: Optional[str] = None) -> Dict[str, str]:
+        """Produce the enhanced, audio, short and voice-replaced outputs
+
+        In 'fused' mode the source is decoded once and the video is split
+        between the enhanced and short branches of a single FFmpeg run. In
+        'parallel' mode each output gets its own FFmpeg process and they run
+        concurrently, which wins when encoding rather than decoding dominates.
+        The voice-replaced output encodes the same enhanced video under the
+        voice track, so it never reads the enhanced file back from disk.
+        """
+        try:
+            logger.info(f"Processing {self.input_path} ({config.PIPELINE_MODE}) with options: {options}")
+            
+            if config.PIPELINE_MODE == 'parallel':
+                tasks = [
+                    run_ffmpeg_async(enhance_args(enabled_options(options)),
+                                     input=self.input_path, output=outputs["enhanced"]),
+                    run_ffmpeg_async(audio_args('mp3'),
+                                     input=self.input_path, output=outputs["audio"])
+                ]
+                if short_duration:
+                    tasks.append(run_ffmpeg_async(short_args(short_duration),
+                                                  input=self.input_path, output=outputs["short"]))
+                if voice_path:
+                    tasks.append(run_ffmpeg_async(enhance_voice_args(enabled_options(options)),
+                                                  input=self.input_path, voice=voice_path,
+                                                  output=outputs["final"]))
+                await asyncio.gather(*tasks)
+            else:
+                template = pipeline_args(enabled_options(options), short_duration, bool(voice_path))
+                await run_ffmpeg_async(template, input=self.input_path, voice=voice_path, **outputs)
+            
+            logger.info(f"Processing finished for {self.input_path}")
+            return outputs
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg error: {e.stderr.decode()}")
+            raise RuntimeError(f"Video processing failed: {e.stderr.decode()}")
+        except Exception as e:
+            logger.error(f"Processing error: {str(e)}")
+            raise
+
     def enhance_video(self, output_path: str, options: Dict) -> str:
         """Apply video enhancements using FFmpeg"""
         try:
             logger.info(f"Enhancing video with options: {options}")
             
-            # Basic enhancement filters
-            filters = []
-            if options.get('denoise'):
-                filters.append('hqdn3d=1.5:1.5:6:6')
-            if options.get('sharpen'):
-                filters.append('unsharp=5:5:0.8:3:3:0.4')
-            if options.get('color_correct'):
-                filters.append('eq=contrast=1.05:brightness=0.02:saturation=1.05')
-            
-            # Build FFmpeg command
-            input_stream = ffmpeg.input(self.input_path)
-            video = input_stream.video
-            
-            if filters:
-                video = video.filter(*filters)
-            
-            output = ffmpeg.output(
-                video,
-                input_stream.audio,
-                output_path,
-                vcodec='libx264',
-                preset='fast',
-                crf=23,
-                acodec='aac',
-                audio_bitrate='192k'
-            )
-            
-            output.run(overwrite_output=True)
+            run_ffmpeg(enhance_args(enabled_options(options)),
+                       input=self.input_path, output=output_path)
             logger.info(f"Enhanced video saved to {output_path}")
             return output_path
             
@@ -105,33 +300,12 @@ class VideoProcessor:
             logger.error(f"Enhancement error: {str(e)}")
             raise
 
-    def remove_watermark(self, output_path: str) -> str:
-        """Placeholder for watermark removal (would use AI in production)"""
-        try:
-            logger.info("Running watermark removal (placeholder)")
-            # In production, this would call an AI service
-            shutil.copy2(self.input_path, output_path)
-            return output_path
-        except Exception as e:
-            logger.error(f"Watermark removal error: {str(e)}")
-            raise
-
     def extract_audio(self, output_path: str, format: str = 'mp3') -> str:
         """Extract audio from video"""
         try:
             logger.info(f"Extracting audio to {output_path}")
             
-            input_stream = ffmpeg.input(self.input_path)
-            audio = input_stream.audio
-            
-            output = ffmpeg.output(
-                audio,
-                output_path,
-                acodec='libmp3lame' if format == 'mp3' else 'aac',
-                audio_bitrate='192k'
-            ).overwrite_output()
-            
-            output.run()
+            run_ffmpeg(audio_args(format), input=self.input_path, output=output_path)
             return output_path
         except ffmpeg.Error as e:
             logger.error(f"Audio extraction failed: {e.stderr.decode()}")
@@ -145,16 +319,7 @@ class VideoProcessor:
         try:
             logger.info(f"Creating {duration}s short clip")
             
-            input_stream = ffmpeg.input(self.input_path)
-            output = ffmpeg.output(
-                input_stream.trim(start=0, duration=duration),
-                output_path,
-                vcodec='libx264',
-                preset='fast',
-                crf=23
-            ).overwrite_output()
-            
-            output.run()
+            run_ffmpeg(short_args(duration), input=self.input_path, output=output_path)
             return output_path
         except ffmpeg.Error as e:
             logger.error(f"Short creation failed: {e.stderr.decode()}")
@@ -168,19 +333,8 @@ class VideoProcessor:
         try:
             logger.info(f"Replacing audio with {audio_path}")
             
-            video_input = ffmpeg.input(self.input_path)
-            audio_input = ffmpeg.input(audio_path)
-            
-            output = ffmpeg.output(
-                video_input.video,
-                audio_input.audio,
-                output_path,
-                vcodec='copy',
-                acodec='aac',
-                shortest=None
-            ).overwrite_output()
-            
-            output.run()
+            run_ffmpeg(replace_audio_args(), input=self.input_path,
+                       voice=audio_path, output=output_path)
             return output_path
         except ffmpeg.Error as e:
             logger.error(f"Audio replacement failed: {e.stderr.decode()}")
@@ -189,6 +343,137 @@ class VideoProcessor:
             logger.error(f"Audio replacement error: {str(e)}")
             raise
 
+def enabled_options(options: Dict) -> frozenset:
+    """Hashable cache key for a set of enhancement options"""
+    return frozenset(name for name, enabled in options.items() if enabled)
+
+def compile_args(*outputs) -> tuple:
+    """Turn ffmpeg-python output nodes into an argv tuple"""
+    return tuple(ffmpeg.merge_outputs(*outputs).global_args('-loglevel', 'error')
+                 .compile(overwrite_output=True))
+
+# Building an ffmpeg-python graph costs far more than formatting an argv, so
+# each option combination is compiled once into a template with {placeholders}
+# for the file paths.
+@functools.lru_cache(maxsize=None)
+def enhance_args(options: frozenset) -> tuple:
+    input_stream = VideoProcessor._input('{input}')
+    return compile_args(VideoProcessor._enhanced_output(
+        input_stream.video, input_stream.audio, '{output}', dict.fromkeys(options, True)))
+
+@functools.lru_cache(maxsize=None)
+def audio_args(format: str) -> tuple:
+    input_stream = ffmpeg.input('{input}')
+    return compile_args(VideoProcessor._audio_output(input_stream.audio, '{output}', format))
+
+@functools.lru_cache(maxsize=None)
+def short_args(duration: int) -> tuple:
+    input_stream = VideoProcessor._input('{input}')
+    return compile_args(VideoProcessor._short_output(input_stream.video, '{output}', duration))
+
+@functools.lru_cache(maxsize=None)
+def replace_audio_args() -> tuple:
+    video_input = ffmpeg.input('{input}')
+    return compile_args(VideoProcessor._replace_audio_output(video_input.video, '{voice}', '{output}'))
+
+@functools.lru_cache(maxsize=None)
+def enhance_voice_args(options: frozenset) -> tuple:
+    input_stream = VideoProcessor._input('{input}')
+    voice = ffmpeg.input('{voice}')
+    return compile_args(VideoProcessor._enhanced_output(
+        input_stream.video, voice.audio, '{output}', dict.fromkeys(options, True), shortest=None))
+
+@functools.lru_cache(maxsize=None)
+def pipeline_args(options: frozenset, short_duration: Optional[int], with_voice: bool) -> tuple:
+    input_stream = VideoProcessor._input('{input}')
+    video = input_stream.video
+    audio = input_stream.audio
+    
+    if short_duration:
+        split = video.filter_multi_output('split')
+        enhanced_video, short_video = split[0], split[1]
+    else:
+        enhanced_video = video
+    
+    # Filter once; with a voice track the enhanced frames feed both the
+    # enhanced and the final output
+    enhanced_video = VideoProcessor._enhance(enhanced_video, dict.fromkeys(options, True))
+    if with_voice:
+        split = enhanced_video.filter_multi_output('split')
+        enhanced_video, final_video = split[0], split[1]
+    
+    nodes = [
+        VideoProcessor._enhanced_output(enhanced_video, audio, '{enhanced}', {}),
+        VideoProcessor._audio_output(audio, '{audio}')
+    ]
+    if short_duration:
+        nodes.append(VideoProcessor._short_output(short_video, '{short}', short_duration))
+    if with_voice:
+        voice = ffmpeg.input('{voice}')
+        nodes.append(VideoProcessor._enhanced_output(final_video, voice.audio, '{final}', {},
+                                                     shortest=None))
+    return compile_args(*nodes)
+
+def run_ffmpeg(args: tuple, **paths) -> None:
+    """Run an FFmpeg argv, filling in any {placeholder} paths"""
+    if paths:
+        args = [arg.format(**paths) for arg in args]
+    result = subprocess.run(args, capture_output=True)
+    if result.returncode != 0:
+        raise ffmpeg.Error('ffmpeg', result.stdout, result.stderr)
+
+# One semaphore per event loop; asyncio primitives can't be shared across loops
+_ffmpeg_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+    weakref.WeakKeyDictionary()
+
+async def run_ffmpeg_async(args: tuple, **paths) -> None:
+    """Like run_ffmpeg, but awaits the process and caps how many run at once"""
+    loop = asyncio.get_running_loop()
+    slots = _ffmpeg_slots.get(loop)
+    if slots is None:
+        slots = _ffmpeg_slots[loop] = asyncio.Semaphore(config.FFMPEG_CONCURRENCY)
+    
+    if paths:
+        args = [arg.format(**paths) for arg in args]
+    async with slots:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise ffmpeg.Error('ffmpeg', stdout, stderr)
+
+def link_or_copy(src: str, dst: str) -> None:
+    """Expose src at dst without copying bytes when the filesystem allows it"""
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.relpath(src, os.path.dirname(dst)), dst)
+        return
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+
+def save_upload(upload: UploadFile, path: str) -> None:
+    """Copy an uploaded file to disk in 1 MiB chunks"""
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(upload.file, buffer, 1 << 20)
+
+# FastAPI parses multipart bodies before the endpoint runs, so the size
+# limit has to be checked here to reject a request before it is read
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if request.url.path == "/upload" and content_length and content_length.isdigit():
+        if int(content_length) > config.MAX_FILE_SIZE:
+            return JSONResponse({"detail": "File too large. Maximum size is 2GB."}, status_code=413)
+    return await call_next(request)
+
 # API Endpoints
 @app.post("/upload")
 async def upload_video(video: UploadFile = File(...), voice: Optional[UploadFile] = File(None)):
@@ -200,11 +485,11 @@ async def upload_video(video: UploadFile = File(...), voice: Optional[UploadFile
             raise HTTPException(400, "Invalid file type. Only video files are allowed.")
         
         # Save video file
-        video_filename = f"video_{uuid.uuid4()}{file_ext}"
+        video_filename = f"video_{secrets.token_hex(16)}{file_ext}"
         video_path = os.path.join(config.UPLOAD_DIR, video_filename)
         
-        with open(video_path, "wb") as buffer:
-            shutil.copyfileobj(video.file, buffer)
+        # Copy in a worker thread so large uploads don't block the event loop
+        await asyncio.to_thread(save_upload, video, video_path)
         
         # Save voice file if provided
         voice_filename = None
@@ -213,11 +498,10 @@ async def upload_video(video: UploadFile = File(...), voice: Optional[UploadFile
             if voice_ext not in ['.wav', '.mp3']:
                 raise HTTPException(400, "Invalid voice file type. Only WAV/MP3 allowed.")
             
-            voice_filename = f"voice_{uuid.uuid4()}{voice_ext}"
+            voice_filename = f"voice_{secrets.token_hex(16)}{voice_ext}"
             voice_path = os.path.join(config.UPLOAD_DIR, voice_filename)
             
-            with open(voice_path, "wb") as buffer:
-                shutil.copyfileobj(voice.file, buffer)
+            await asyncio.to_thread(save_upload, voice, voice_path)
         
         logger.info(f"Uploaded video: {video_filename}")
         if voice_filename:
@@ -241,18 +525,16 @@ class ProcessRequest(BaseModel):
     replace_voice: bool = False
     create_short: bool = True
 
-@app.post("/process")
-async def process_video(request: ProcessRequest):
-    """Process video with given options"""
-    job_id = str(uuid.uuid4())
+# Job status by job_id. Kept in memory, so run a single worker process or
+# swap this for a shared store (e.g. Redis) when scaling out.
+jobs: Dict[str, Dict] = {}
+
+async def run_pipeline(request: ProcessRequest, job_id: str, input_path: str):
+    """Run the processing pipeline for a queued job"""
+    jobs[job_id]["status"] = "processing"
     logger.info(f"Starting job {job_id} for {request.filename}")
     
     try:
-        # Validate input file
-        input_path = os.path.join(config.UPLOAD_DIR, request.filename)
-        if not os.path.exists(input_path):
-            raise HTTPException(404, "Video file not found")
-        
         processor = VideoProcessor(input_path)
         base_name = os.path.splitext(request.filename)[0]
         timestamp = str(int(time.time()))
@@ -260,49 +542,44 @@ async def process_video(request: ProcessRequest):
         # Prepare output paths
         outputs = {
             "enhanced": os.path.join(config.OUTPUT_DIR, f"{base_name}_enhanced_{timestamp}.mp4"),
-            "no_watermark": os.path.join(config.OUTPUT_DIR, f"{base_name}_nowm_{timestamp}.mp4"),
             "audio": os.path.join(config.OUTPUT_DIR, f"{base_name}_audio_{timestamp}.mp3"),
             "short": os.path.join(config.OUTPUT_DIR, f"{base_name}_short_{timestamp}.mp4"),
             "final": os.path.join(config.OUTPUT_DIR, f"{base_name}_final_{timestamp}.mp4")
         }
+        # Watermark removal is still a placeholder, so it serves the enhanced video
+        outputs["no_watermark"] = outputs["enhanced"]
         
-        # Processing pipeline
-        # 1. Enhance video
-        processor.enhance_video(outputs["enhanced"], {
-            "denoise": request.enhance,
-            "sharpen": request.enhance,
-            "color_correct": request.enhance
-        })
-        
-        # 2. Remove watermark (placeholder)
-        processor.remove_watermark(outputs["no_watermark"])
-        
-        # 3. Extract audio
-        processor.extract_audio(outputs["audio"])
-        
-        # 4. Create short clip
-        if request.create_short:
-            processor.create_short(outputs["short"], 30)
-        
-        # 5. Voice replacement
+        # Voice replacement input
+        voice_path = None
         if request.replace_voice and request.voice_file:
             voice_path = os.path.join(config.UPLOAD_DIR, request.voice_file)
-            if os.path.exists(voice_path):
-                processor.replace_audio(voice_path, outputs["final"])
-            else:
+            if not os.path.exists(voice_path):
                 logger.warning("Voice file not found, skipping replacement")
-                shutil.copy2(outputs["no_watermark"], outputs["final"])
-        else:
-            shutil.copy2(outputs["no_watermark"], outputs["final"])
+                voice_path = None
+        
+        # Processing pipeline: enhance, extract audio, short clip and voice replacement
+        await processor.process(
+            outputs,
+            {
+                "denoise": request.enhance,
+                "sharpen": request.enhance,
+                "color_correct": request.enhance
+            },
+            short_duration=30 if request.create_short else None,
+            voice_path=voice_path
+        )
+        
+        if not voice_path:
+            # May fall back to a full copy, so keep it off the event loop
+            await asyncio.to_thread(link_or_copy, outputs["no_watermark"], outputs["final"])
         
         # Cleanup
         processor.cleanup()
         
         # Prepare download URLs
         download_base = "/download/"
-        response = {
-            "success": True,
-            "job_id": job_id,
+        jobs[job_id].update({
+            "status": "completed",
             "downloads": {
                 "enhanced": download_base + os.path.basename(outputs["enhanced"]),
                 "no_watermark": download_base + os.path.basename(outputs["no_watermark"]),
@@ -310,28 +587,60 @@ async def process_video(request: ProcessRequest):
                 "short": download_base + os.path.basename(outputs["short"]),
                 "final": download_base + os.path.basename(outputs["final"])
             }
-        }
+        })
         
         logger.info(f"Job {job_id} completed successfully")
-        return JSONResponse(response)
     
     except Exception as e:
         logger.error(f"Job {job_id} failed: {str(e)}")
-        raise HTTPException(500, f"Processing failed: {str(e)}")
+        jobs[job_id].update({"status": "failed", "error": f"Processing failed: {str(e)}"})
+
+@app.post("/process")
+async def process_video(request: ProcessRequest, background_tasks: BackgroundTasks):
+    """Queue video processing with given options"""
+    # Validate input file
+    input_path = os.path.join(config.UPLOAD_DIR, request.filename)
+    if not os.path.exists(input_path):
+        raise HTTPException(404, "Video file not found")
+    
+    job_id = str(uuid.uuid4())
+    jobs[job_id] = {"status": "queued", "filename": request.filename}
+    background_tasks.add_task(run_pipeline, request, job_id, input_path)
+    logger.info(f"Queued job {job_id} for {request.filename}")
+    
+    return JSONResponse({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued"
+    })
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Report the status of a processing job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return {"job_id": job_id, **job}
 
 @app.get("/download/{filename}")
 async def download_file(filename: str):
     """Serve processed files for download"""
     try:
         file_path = os.path.join(config.OUTPUT_DIR, filename)
-        if not os.path.exists(file_path):
+        try:
+            stat_result = os.stat(file_path)
+        except FileNotFoundError:
             raise HTTPException(404, "File not found")
         
+        # Passing stat_result saves starlette a second stat before it streams the file
         return FileResponse(
             file_path,
             filename=filename,
-            media_type="application/octet-stream"
+            media_type="application/octet-stream",
+            stat_result=stat_result
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Download failed for {filename}: {str(e)}")
         raise HTTPException(500, f"Download failed: {str(e)}")
@@ -343,4 +652,6 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # uvloop and httptools come with uvicorn[standard] (requirements.txt).
+    # Stay on one worker: job status lives in process memory.
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
@@ -1,11 +1,15 @@
 # app.py - Professional Video Cutter with Vikas Features
-from flask import Flask, render_template, request, send_file, redirect, url_for
+from flask import Flask, Request, Response, render_template, request, send_file
 import os
-import uuid
+import secrets
 from datetime import datetime
 import subprocess
 import shutil
+import threading
+import time
 import logging
+import numpy as np
+from urllib.parse import quote
 from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
@@ -16,6 +20,30 @@ app.config['PROCESSED_FOLDER'] = 'vikas_processed'
 app.config['ALLOWED_EXTENSIONS'] = {'mp4', 'mov', 'avi', 'mkv', 'webm'}
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB
 app.config['MAX_FILE_AGE'] = 3600  # 1 hour in seconds
+app.config['CLEANUP_INTERVAL'] = 300  # 5 minutes
+app.config['TRIM_PRESET'] = 'ultrafast'  # libx264 preset for frame-accurate trims
+
+# Vikas Feature: Set to an nginx internal location (e.g. '/vikas_processed/') to let
+# nginx serve downloads itself via X-Accel-Redirect. Otherwise send_file hands the file
+# to the server's wsgi.file_wrapper, which gunicorn serves with sendfile(2).
+app.config['X_ACCEL_PREFIX'] = None
+
+# Vikas Feature: Stream uploaded files straight to their final location. Werkzeug
+# would otherwise spool large uploads to /tmp and save() would copy them again.
+class VikasRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+        name = f"vikas_{secrets.token_hex(16)}_{secure_filename(filename or '')}"
+        return open(os.path.join(app.config['UPLOAD_FOLDER'], name), 'wb+')
+
+app.request_class = VikasRequest
+
+# Vikas Feature: Delete an upload that was rejected
+def discard_upload(upload_path):
+    try:
+        os.remove(upload_path)
+    except OSError:
+        pass
 
 # Vikas Feature: Create necessary directories with permissions
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -32,30 +60,98 @@ except:
 logging.basicConfig(filename='vikas_video_cutter.log', level=logging.INFO,
                     format='%(asctime)s %(levelname)s: %(message)s')
 
+# Vikas Feature: Check once at startup if FFmpeg is available
+def check_ffmpeg():
+    try:
+        ffmpeg_check = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        if "ffmpeg version" in ffmpeg_check.stdout:
+            logging.info("Vikas System: FFmpeg is available")
+            return True
+        logging.warning("Vikas System: FFmpeg not found, video processing disabled")
+    except:
+        logging.warning("Vikas System: FFmpeg check failed")
+    return False
+
+app.config['FFMPEG_AVAILABLE'] = check_ffmpeg()
+
 # Vikas Feature: Helper function to check allowed file types
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+# Vikas Feature: Build FFmpeg trim command
+def build_trim_command(input_path, output_path, start_time, end_time, frame_accurate=False):
+    # -ss before -i seeks straight to the keyframe before start_time
+    cmd = [
+        'ffmpeg', '-y',
+        '-ss', str(start_time),
+        '-i', input_path,
+        '-t', str(end_time - start_time)
+    ]
+    if frame_accurate:
+        # Re-encode video only when the user asks for exact cut points
+        cmd += ['-c:v', 'libx264', '-preset', app.config['TRIM_PRESET'],
+                '-threads', str(os.cpu_count() or 1), '-c:a', 'copy']
+    else:
+        # Remux without decoding; cuts land on the nearest keyframe
+        cmd += ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+    cmd += ['-movflags', '+faststart', output_path]
+    return cmd
+
+# Vikas Feature: Zero-copy download response
+def send_processed_file(filename, output_path):
+    accel_prefix = app.config['X_ACCEL_PREFIX']
+    if not accel_prefix:
+        return send_file(output_path, as_attachment=True)
+    response = Response(mimetype='application/octet-stream')
+    response.headers['X-Accel-Redirect'] = accel_prefix + quote(filename)
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    return response
+
 # Vikas Feature: Cleanup old files
 def cleanup_old_files():
     try:
-        now = datetime.now().timestamp()
+        cutoff = time.time() - app.config['MAX_FILE_AGE']
         for folder in [app.config['UPLOAD_FOLDER'], app.config['PROCESSED_FOLDER']]:
-            for filename in os.listdir(folder):
-                file_path = os.path.join(folder, filename)
-                if os.path.isfile(file_path):
-                    file_age = now - os.path.getctime(file_path)
-                    if file_age > app.config['MAX_FILE_AGE']:
-                        os.remove(file_path)
-                        logging.info(f"Vikas Cleanup: Removed old file {filename}")
+            # scandir entries carry the file type, so only one stat per file is needed
+            with os.scandir(folder) as it:
+                entries = [entry for entry in it if entry.is_file()]
+            if not entries:
+                continue
+            
+            # Compare all ctimes against the cutoff in one vectorized pass
+            ctimes = np.fromiter((entry.stat().st_ctime for entry in entries),
+                                 dtype=np.float64, count=len(entries))
+            for index in np.flatnonzero(ctimes < cutoff):
+                entry = entries[index]
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue  # Already removed by another worker
+                logging.info(f"Vikas Cleanup: Removed old file {entry.name}")
     except Exception as e:
         logging.error(f"Vikas Cleanup Error: {str(e)}")
 
+# Vikas Feature: Run cleanup in the background instead of on every request
+def schedule_cleanup():
+    cleanup_old_files()
+    timer = threading.Timer(app.config['CLEANUP_INTERVAL'], schedule_cleanup)
+    timer.daemon = True
+    timer.start()
+
+schedule_cleanup()
+
+# Vikas Feature: Reject oversized uploads before any of the body is read
+@app.before_request
+def check_content_length():
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return render_template('index.html', 
+                               error="❌ फाइल बहुत बड़ी है! अधिकतम 500MB",
+                               current_year=datetime.now().year), 413
+
 # Vikas Feature: Main route
 @app.route('/')
 def index():
-    cleanup_old_files()  # Cleanup before serving
     return render_template('index.html', 
                            current_year=datetime.now().year,
                            video_file=None,
@@ -64,8 +160,6 @@ def index():
 # Vikas Feature: Video processing route
 @app.route('/process', methods=['POST'])
 def process_video():
-    cleanup_old_files()  # Cleanup before processing
-    
     # Check if file was uploaded
     if 'video' not in request.files:
         return render_template('index.html', 
@@ -74,24 +168,34 @@ def process_video():
     
     video_file = request.files['video']
     
+    # The body is already on disk at its final path (see VikasRequest)
+    upload_path = video_file.stream.name
+    filename = os.path.basename(upload_path)
+    video_file.stream.close()
+    
     # Check if file is selected
     if video_file.filename == '':
+        discard_upload(upload_path)
         return render_template('index.html', 
                                error="❌ फाइल का नाम खाली है!",
                                current_year=datetime.now().year)
     
     # Check if file is allowed
     if not (video_file and allowed_file(video_file.filename)):
+        discard_upload(upload_path)
         return render_template('index.html', 
                                error="❌ गलत फाइल प्रकार! केवल MP4, MOV, AVI, MKV, WEBM स्वीकार्य हैं।",
                                current_year=datetime.now().year)
     
+    # Vikas Feature: FFmpeg availability is detected once at startup
+    if not app.config['FFMPEG_AVAILABLE']:
+        discard_upload(upload_path)
+        return render_template('index.html', 
+                               error="❌ FFmpeg उपलब्ध नहीं है!",
+                               current_year=datetime.now().year)
+    
     try:
-        # Generate unique filename with Vikas prefix
         original_filename = secure_filename(video_file.filename)
-        filename = f"vikas_{uuid.uuid4().hex}_{original_filename}"
-        upload_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        video_file.save(upload_path)
         
         # Get start and end times
         start_time = float(request.form['start_time'])
@@ -99,11 +203,13 @@ def process_video():
         
         # Validate times
         if start_time < 0 or end_time < 0:
+            discard_upload(upload_path)
             return render_template('index.html', 
                                    error="❌ समय ऋणात्मक नहीं हो सकता!",
                                    current_year=datetime.now().year)
         
         if start_time >= end_time:
+            discard_upload(upload_path)
             return render_template('index.html', 
                                    error="❌ अंत समय शुरू समय से अधिक होना चाहिए!",
                                    current_year=datetime.now().year)
@@ -112,29 +218,12 @@ def process_video():
         output_filename = f"vikas_trimmed_{filename}"
         output_path = os.path.join(app.config['PROCESSED_FOLDER'], output_filename)
         
-        # Vikas Feature: Video trimming using FFmpeg (more reliable)
+        # Vikas Feature: Video trimming using FFmpeg stream copy
         try:
-            # First try with moviepy if available
-            try:
-                from moviepy.editor import VideoFileClip
-                with VideoFileClip(upload_path) as video:
-                    if end_time > video.duration:
-                        end_time = video.duration
-                    trimmed = video.subclip(start_time, end_time)
-                    trimmed.write_videofile(output_path, codec='libx264', audio_codec='aac')
-            except ImportError:
-                # Fallback to FFmpeg if moviepy not available
-                cmd = [
-                    'ffmpeg',
-                    '-i', upload_path,
-                    '-ss', str(start_time),
-                    '-to', str(end_time),
-                    '-c:v', 'libx264',
-                    '-c:a', 'aac',
-                    '-strict', 'experimental',
-                    output_path
-                ]
-                subprocess.run(cmd, check=True)
+            frame_accurate = request.form.get('frame_accurate') in ('1', 'true', 'on')
+            subprocess.run(build_trim_command(upload_path, output_path,
+                                              start_time, end_time, frame_accurate),
+                           check=True)
             
             logging.info(f"Vikas Success: Processed {original_filename} ({start_time}-{end_time}s)")
             return render_template('index.html', 
@@ -143,12 +232,14 @@ def process_video():
         
         except Exception as e:
             logging.error(f"Vikas Processing Error: {str(e)}")
+            discard_upload(upload_path)
             return render_template('index.html', 
                                    error=f"⚠️ वीडियो प्रोसेसिंग में त्रुटि: {str(e)}",
                                    current_year=datetime.now().year)
     
     except Exception as e:
         logging.error(f"Vikas System Error: {str(e)}")
+        discard_upload(upload_path)
         return render_template('index.html', 
                                error=f"⚠️ सिस्टम त्रुटि: {str(e)}",
                                current_year=datetime.now().year)
@@ -158,8 +249,8 @@ def process_video():
 def download_file(filename):
     try:
         output_path = os.path.join(app.config['PROCESSED_FOLDER'], filename)
-        if os.path.exists(output_path):
-            return send_file(output_path, as_attachment=True)
+        if os.path.isfile(output_path):
+            return send_processed_file(filename, output_path)
         else:
             return render_template('index.html', 
                                    error="❌ फाइल नहीं मिली!",
@@ -193,15 +284,7 @@ def cleanup():
         return f"❌ विकास सफाई विफल: {str(e)}", 500
 
 if __name__ == '__main__':
-    # Vikas Feature: Check if FFmpeg is available
-    try:
-        ffmpeg_check = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
-        if "ffmpeg version" in ffmpeg_check.stdout:
-            logging.info("Vikas System: FFmpeg is available")
-        else:
-            logging.warning("Vikas System: FFmpeg not found, using fallback methods")
-    except:
-        logging.warning("Vikas System: FFmpeg check failed")
-    
-    # Run the app
-    app.run(host='0.0.0.0', port=8080, debug=True)
\ No newline at end of file
+    # Development server only. In production run under gunicorn so uploads are
+    # multiplexed and transcodes spread across worker processes:
+    #   gunicorn -w $(nproc) -k gevent --timeout 600 -b 0.0.0.0:8080 app:app
+    app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
@@ -1,8 +1,9 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from werkzeug.utils import secure_filename
 import os
-import time
-import random
+import shutil
+import secrets
+from urllib.parse import quote
 
 app = Flask(__name__)
 
@@ -13,6 +14,11 @@ ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'mp4', 'mov'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['PROCESSED_FOLDER'] = PROCESSED_FOLDER
 
+# Set to an nginx internal location (e.g. '/processed/') to let nginx serve
+# downloads itself via X-Accel-Redirect. Otherwise send_from_directory hands the
+# file to the server's wsgi.file_wrapper, which gunicorn serves with sendfile(2).
+X_ACCEL_PREFIX = None
+
 # Ensure folders exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(PROCESSED_FOLDER, exist_ok=True)
@@ -63,13 +69,13 @@ def process_media():
         return jsonify({'error': 'File not found'}), 404
 
     # Simulate processing by renaming
-    new_filename = f"vikas_{int(time.time())}_{random.randint(1000,9999)}_{filename}"
+    new_filename = f"vikas_{secrets.token_hex(16)}_{filename}"
     output_path = os.path.join(PROCESSED_FOLDER, new_filename)
 
-    # Just copy for now (replace with real processing later)
-    with open(input_path, 'rb') as f_in:
-        with open(output_path, 'wb') as f_out:
-            f_out.write(f_in.read())
+    # Just copy for now (replace with real processing later).
+    # copyfile streams in kernel space (sendfile on Linux) instead of reading
+    # the whole file into memory.
+    shutil.copyfile(input_path, output_path)
 
     return jsonify({
         'message': f'{effect} applied successfully using Vikas Feature',
@@ -80,9 +86,16 @@ def process_media():
 # Route to download the processed file
 @app.route('/download/<filename>')
 def download_file(filename):
+    if X_ACCEL_PREFIX:
+        response = Response(mimetype='application/octet-stream')
+        response.headers['X-Accel-Redirect'] = X_ACCEL_PREFIX + quote(filename)
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+        return response
     return send_from_directory(PROCESSED_FOLDER, filename, as_attachment=True)
 
 
 if __name__ == '__main__':
     print("🚀 Vikas Feature Editor Backend Started!")
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Development server only; in production run under gunicorn, e.g.
+    #   gunicorn -w $(nproc) -k gevent --timeout 600 -b 0.0.0.0:5000 app:app
+    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
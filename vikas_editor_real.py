@@ -1,10 +1,35 @@
 import os
 import sys
-import json
-import subprocess
 import shutil
+import subprocess
+import logging
+import itertools
+import functools
+import importlib
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from abc import ABC, abstractmethod
+from enum import IntEnum
+from types import MappingProxyType
+from fractions import Fraction
+
+import numpy as np
+
+class _FeatureFormatter(logging.Formatter):
+    """Prefix records of the per-feature "vikas.<feature name>" loggers with the feature name"""
+    def format(self, record):
+        message = super().format(record)
+        if record.name == "vikas":
+            return message
+        return f"[{record.name[6:]}] {message}"
+
+_LOG = logging.getLogger("vikas")
+_LOG.setLevel(logging.INFO)
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(_FeatureFormatter())
+_LOG.addHandler(_handler)
+_LOG.propagate = False
 
 # Constants
 VIKAS_VERSION = "1.0.0"
@@ -18,32 +43,458 @@ VIKAS_LOGO = """
    Video Editor by Vikas - v1.0.0
 """
 
-class VikasFeature(ABC):
-    """Abstract base class for all Vikas Editor features"""
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+_op_order = itertools.count()
+
+@functools.lru_cache(maxsize=None)
+def _optional_module(name):
+    """Import an optional dependency (numba, PIL, imageio.v3, orjson) on first use; None if missing"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+def _escape_filter_value(value):
+    """Escape a value for an option inside a filter_complex graph"""
+    value = str(value)
+    for char in "\\':":
+        value = value.replace(char, "\\" + char)
+    for char in "\\'[],;":
+        value = value.replace(char, "\\" + char)
+    return value
+
+def _looped_input(path):
+    """Input options that keep a still image, GIF or clip running for the whole video"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return ["-loop", "1", "-i", path]
+    if ext == ".gif":
+        return ["-ignore_loop", "0", "-i", path]
+    return ["-stream_loop", "-1", "-i", path]
+
+_DATETIME_KEYS = ("created", "modified", "timestamp")
+
+def _json_default(obj):
+    """Fallback encoder for the stdlib json path; matches orjson's ISO datetime output"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+def _to_ns(value):
+    """Nanoseconds since the epoch for a datetime, or an int that already is"""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1_000_000) * 1000
+    return int(value)
+
+def _to_ms(seconds):
+    """Milliseconds for a time given in seconds or in FFmpeg's [[HH:]MM:]SS[.m] syntax"""
+    total = 0.0
+    for part in str(seconds).split(":"):
+        total = total * 60 + float(part)
+    return round(total * 1000)
+
+def _revive_timestamps(obj):
+    """Turn ISO strings under the known datetime keys (older project files) into ns timestamps, in place"""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in _DATETIME_KEYS and isinstance(value, str):
+                try:
+                    obj[key] = _to_ns(datetime.fromisoformat(value))
+                except ValueError:
+                    pass
+            else:
+                _revive_timestamps(value)
+    elif isinstance(obj, list):
+        for item in obj:
+            _revive_timestamps(item)
+    return obj
+
+def _position_anchor(position):
+    """Split a named position like "top-center" into its (vertical, horizontal) anchors"""
+    if position == "center":
+        return "center", "center"
+    vertical, _, horizontal = position.partition("-")
+    return vertical, horizontal
+
+def _position_xy(position, main_w, main_h, item_w, item_h, margin=10):
+    """Map a named position (e.g. "top-center") or an (x, y) pair to FFmpeg expressions"""
+    if not isinstance(position, str):
+        return str(position[0]), str(position[1])
+    vertical, horizontal = _position_anchor(position)
+    x = {"left": str(margin), "center": f"({main_w}-{item_w})/2",
+         "right": f"{main_w}-{item_w}-{margin}"}.get(horizontal, str(margin))
+    y = {"top": str(margin), "center": f"({main_h}-{item_h})/2",
+         "bottom": f"{main_h}-{item_h}-{margin}"}.get(vertical, str(margin))
+    return x, y
+
+def _position_px(position, main_w, main_h, item_w, item_h, margin=10):
+    """Pixel offset of an item for a named position or an (x, y) pair"""
+    if not isinstance(position, str):
+        return int(position[0]), int(position[1])
+    vertical, horizontal = _position_anchor(position)
+    x = {"center": (main_w - item_w) // 2, "right": main_w - item_w - margin}.get(horizontal, margin)
+    y = {"center": (main_h - item_h) // 2, "bottom": main_h - item_h - margin}.get(vertical, margin)
+    return x, y
+
+def _premultiply(rgba):
+    """Premultiply the RGB channels of an RGBA uint8 image (or stack of images) by alpha, in place"""
+    rgba[..., :3] = (rgba[..., :3].astype(np.uint16) * rgba[..., 3:4] + 127) // 255
+    return rgba
+
+@functools.lru_cache(maxsize=None)
+def _resolve_tool(name):
+    """Absolute path of an FFmpeg tool on PATH, else of the static build bundled in bin/"""
+    bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin", name + (".exe" if os.name == "nt" else ""))
+    return shutil.which(name) or bundled
+
+def _probe_video(video_path):
+    """Return (width, height, frame_rate) of the first video stream as FFmpeg decodes it, or None if ffprobe can't read it
+
+    FFmpeg autorotates on decode, so a 90° rotation swaps the coded width
+    and height; a missing frame rate falls back to avg_frame_rate, then 25.
+    """
+    import json
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "stream=width,height,r_frame_rate,avg_frame_rate:stream_tags=rotate:stream_side_data=rotation",
+           "-of", "json", video_path]
+    try:
+        result = subprocess.run(cmd, executable=_resolve_tool("ffprobe"), capture_output=True, text=True)
+        stream = json.loads(result.stdout)["streams"][0]
+        width, height = int(stream["width"]), int(stream["height"])
+        rotation = stream.get("tags", {}).get("rotate", 0)
+        for side_data in stream.get("side_data_list", []):
+            rotation = side_data.get("rotation", rotation)
+        if int(float(rotation)) % 180:
+            width, height = height, width
+    except (OSError, ValueError, KeyError, IndexError):
+        return None
+    for frame_rate in (stream.get("r_frame_rate"), stream.get("avg_frame_rate")):
+        try:
+            if frame_rate and Fraction(frame_rate) > 0:
+                return width, height, frame_rate
+        except (ValueError, ZeroDivisionError):
+            continue
+    return width, height, "25"
+
+def _probe_audio(path):
+    """Return (has_audio, duration_seconds) of a media file, or None if ffprobe can't read it"""
+    import json
+    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration:stream=codec_type", "-of", "json", path]
+    try:
+        result = subprocess.run(cmd, executable=_resolve_tool("ffprobe"), capture_output=True, text=True)
+        info = json.loads(result.stdout)
+        has_audio = any(stream.get("codec_type") == "audio" for stream in info.get("streams", []))
+        return has_audio, float(info["format"]["duration"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+@functools.lru_cache(maxsize=None)
+def _ffmpeg_capabilities(flag):
+    """Cached output of `ffmpeg -hide_banner <flag>` (e.g. -hwaccels, -filters); "" if unavailable"""
+    try:
+        result = subprocess.run(["ffmpeg", "-hide_banner", flag], executable=_resolve_tool("ffmpeg"),
+                                capture_output=True, text=True)
+    except OSError:
+        return ""
+    return result.stdout
+
+@functools.lru_cache(maxsize=None)
+def _cuda_device_works():
+    """True if FFmpeg can open a CUDA device here; the build lists CUDA support even without a GPU"""
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-init_hw_device", "cuda",
+           "-f", "lavfi", "-i", "nullsrc=s=64x64", "-frames:v", "1", "-f", "null", "-"]
+    try:
+        return subprocess.run(cmd, executable=_resolve_tool("ffmpeg"), capture_output=True, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+@functools.lru_cache(maxsize=None)
+def _hwaccels():
+    """Hardware acceleration methods the FFmpeg build supports, e.g. {"cuda", "vaapi"}"""
+    # First line is the "Hardware acceleration methods:" header
+    return frozenset(_ffmpeg_capabilities("-hwaccels").partition("\n")[2].split())
+
+def _composite(frame, rgba, x, y):
+    """Blend a premultiplied RGBA overlay onto `frame` at (x, y), in place; off-frame parts are clipped"""
+    y0, y1 = max(y, 0), min(y + rgba.shape[0], frame.shape[0])
+    x0, x1 = max(x, 0), min(x + rgba.shape[1], frame.shape[1])
+    if x0 >= x1 or y0 >= y1:
+        return
+    src = rgba[y0 - y:y1 - y, x0 - x:x1 - x]
+    region = frame[y0:y1, x0:x1]
+    inverse = 255 - src[..., 3:4].astype(np.uint16)
+    region[...] = src[..., :3] + (region * inverse + 127) // 255
+
+def _composite_loop(frame, rgba, x, y):
+    """Numba body of _composite"""
+    y0, y1 = max(y, 0), min(y + rgba.shape[0], frame.shape[0])
+    x0, x1 = max(x, 0), min(x + rgba.shape[1], frame.shape[1])
+    for row in prange(y0, y1):
+        for col in range(x0, x1):
+            inverse = 255 - np.int32(rgba[row - y, col - x, 3])
+            for c in range(3):
+                frame[row, col, c] = np.uint8(rgba[row - y, col - x, c]
+                                              + (np.int32(frame[row, col, c]) * inverse + 127) // 255)
+
+def _read_frame(stream, buffer):
+    """Fill `buffer` with the next raw frame from `stream`; False at end of stream"""
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(buffer):
+        count = stream.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+    return True
+
+MATRIX_SHIFT = 6  # int8 color-matrix coefficients are fixed point with 6 fractional bits
+
+def _tone_lut(contrast):
+    """Build a uint8[256, 3] LUT applying an S-curve of strength `contrast` to every channel"""
+    x = np.arange(256, dtype=np.float32) / 255
+    curve = (1 - contrast) * x + contrast * x * x * (3 - 2 * x)
+    lut = np.clip(curve * 255 + 0.5, 0, 255).astype(np.uint8)
+    return np.ascontiguousarray(np.repeat(lut[:, None], 3, axis=1))
+
+def _color_matrix(saturation, gains, offsets):
+    """Quantize a saturation + per-channel gain/offset grade to an int8[3, 3] matrix and int16[3] bias"""
+    luma = np.array([0.299, 0.587, 0.114])
+    matrix = (1 - saturation) * luma[None, :] + saturation * np.eye(3)
+    matrix *= np.asarray(gains)[:, None]
+    scale = 1 << MATRIX_SHIFT
+    return (np.clip(np.round(matrix * scale), -128, 127).astype(np.int8),
+            np.round(np.asarray(offsets) * scale).astype(np.int16))
+
+def _scale_matrix(matrix, bias, intensity):
+    """Move an int8 matrix and its bias towards the identity by `intensity` (0 = no change)"""
+    identity = np.eye(3) * (1 << MATRIX_SHIFT)
+    scaled = identity + intensity * (matrix.astype(np.float64) - identity)
+    return (np.ascontiguousarray(np.clip(np.round(scaled), -128, 127).astype(np.int8)),
+            np.round(bias * intensity).astype(np.int16))
+
+def _apply_filter_kernel(frame, lut, intensity):
+    """Blend each pixel towards lut[pixel] by `intensity`, in place"""
+    graded = lut[frame, np.arange(frame.shape[2])].astype(np.float32)
+    frame[...] = np.clip(frame + (graded - frame) * intensity + 0.5, 0, 255)
+
+def _apply_filter_loop(frame, lut, intensity):
+    """Numba body of _apply_filter_kernel"""
+    height, width, channels = frame.shape
+    for y in prange(height):
+        for x in range(width):
+            for c in range(channels):
+                value = frame[y, x, c]
+                blended = value + (lut[value, c] - np.float32(value)) * intensity + np.float32(0.5)
+                frame[y, x, c] = np.uint8(min(max(blended, np.float32(0)), np.float32(255)))
+
+def _apply_matrix_int8(frame, matrix, bias, shift):
+    """frame = clip((matrix @ pixel + bias) >> shift), in place, with int32 accumulation"""
+    # int16 would overflow: 255 * 127 * 3 needs 17 bits
+    acc = np.einsum("hwc,dc->hwd", frame.astype(np.int32), matrix.astype(np.int32))
+    frame[...] = np.clip((acc + bias + (1 << (shift - 1))) >> shift, 0, 255)
+
+def _apply_matrix_loop(frame, matrix, bias, shift):
+    """Numba body of _apply_matrix_int8"""
+    height, width, _ = frame.shape
+    rounding = np.int32(1 << (shift - 1))
+    for y in prange(height):
+        for x in range(width):
+            r = np.int32(frame[y, x, 0])
+            g = np.int32(frame[y, x, 1])
+            b = np.int32(frame[y, x, 2])
+            for c in range(3):
+                value = (matrix[c, 0] * r + matrix[c, 1] * g + matrix[c, 2] * b
+                         + bias[c] + rounding) >> shift
+                frame[y, x, c] = np.uint8(min(max(value, 0), 255))
+
+def _echo_kernel(x, delay, gain):
+    """Feedback comb y[i] = x[i] + gain * y[i - delay], in place, one delay-sized block at a time"""
+    n = x.shape[0]
+    for start in range(delay, n, delay):
+        end = min(start + delay, n)
+        x[start:end] += gain * x[start - delay:end - delay]
+
+def _allpass_kernel(x, delay, gain):
+    """Schroeder all-pass y[i] = -gain * x[i] + x[i - delay] + gain * y[i - delay], in place"""
+    n = x.shape[0]
+    src = x.copy()
+    x[:delay] = -gain * src[:delay]
+    for start in range(delay, n, delay):
+        end = min(start + delay, n)
+        x[start:end] = -gain * src[start:end] + src[start - delay:end - delay] + gain * x[start - delay:end - delay]
+
+def _reverb_kernel(x, rate, mix):
+    """Schroeder reverb: four parallel combs into two all-passes, blended in place by `mix`"""
+    wet = np.zeros_like(x)
+    for delay_ms, gain in ((29.7, 0.77), (37.1, 0.74), (41.1, 0.72), (43.7, 0.7)):
+        comb = x.copy()
+        _echo_kernel(comb, max(1, int(rate * delay_ms / 1000)), gain)
+        wet += comb
+    wet *= 0.25
+    for delay_ms in (5.0, 1.7):
+        _allpass_kernel(wet, max(1, int(rate * delay_ms / 1000)), 0.7)
+    x[:] = (1 - mix) * x + mix * wet
+
+def _pitch_kernel(x, ratio, window):
+    """Shift pitch by `ratio` without changing duration, in place
+
+    Two read taps sweep a `window`-sample delay line half a window apart;
+    triangular crossfades between them sum to one.
+    """
+    n = x.shape[0]
+    t = np.arange(n).astype(np.float64)
+    d1 = np.mod(t * (1 - ratio), window)
+    d2 = np.mod(d1 + window / 2, window)
+    out = np.zeros(n, dtype=np.float64)
+    for d in (d1, d2):
+        pos = np.maximum(t - d, 0.0)
+        i0 = pos.astype(np.int64)
+        i1 = np.minimum(i0 + 1, n - 1)
+        frac = pos - i0
+        out += (1 - np.abs(2 * d / window - 1)) * ((1 - frac) * x[i0] + frac * x[i1])
+    x[:] = out
+
+prange = range  # rebound to numba.prange by _load_kernels() before any loop body is compiled
+
+@functools.lru_cache(maxsize=None)
+def _load_kernels():
+    """Swap in Numba-compiled kernels on first use; the NumPy versions stay when Numba is missing"""
+    numba = _optional_module("numba")
+    if numba is None:
+        return False
+    global prange, _composite, _apply_filter_kernel, _apply_matrix_int8
+    global _echo_kernel, _allpass_kernel, _reverb_kernel, _pitch_kernel
+    prange = numba.prange
+    frame_jit = functools.partial(numba.njit, cache=True, parallel=True, fastmath=True, boundscheck=False)
+    _composite = frame_jit("void(uint8[:,:,::1], uint8[:,:,::1], int64, int64)")(_composite_loop)
+    _apply_filter_kernel = frame_jit("void(uint8[:,:,::1], uint8[:,::1], float32)")(_apply_filter_loop)
+    _apply_matrix_int8 = frame_jit("void(uint8[:,:,::1], int8[:,::1], int16[::1], int64)")(_apply_matrix_loop)
+    # The DSP kernels share one body with NumPy; reverb calls the comb and all-pass, so those go first
+    dsp_jit = numba.njit(cache=True, fastmath=True)
+    _echo_kernel = dsp_jit(_echo_kernel)
+    _allpass_kernel = dsp_jit(_allpass_kernel)
+    _reverb_kernel = dsp_jit(_reverb_kernel)
+    _pitch_kernel = dsp_jit(_pitch_kernel)
+    return True
+
+def _decode_to_float32(run_ffmpeg, path, rate, channels):
+    """Decode a file's audio to planar float32 PCM of shape (channels, samples), or None"""
+    pcm = run_ffmpeg(["ffmpeg", "-loglevel", "error", "-i", path, "-vn",
+                      "-f", "f32le", "-ac", str(channels), "-ar", str(rate), "-"])
+    if not pcm:
+        return None
+    return np.frombuffer(pcm, dtype=np.float32).reshape(-1, channels).T.copy()
+
+class FeatureId(IntEnum):
+    """Index of each core feature in VikasEditor._features"""
+    EDIT = 0
+    TEXT = 1
+    STICKER = 2
+    SOUND = 3
+    EFFECTS = 4
+    BACKGROUND = 5
+
+class PendingOperation:
+    """Handle for a queued operation; `done` turns True once it is rendered"""
+    __slots__ = ("operation", "inputs", "outputs", "segments", "params", "order", "done")
+    
+    def __init__(self, operation, inputs, outputs=None, segments=None, params=None):
+        self.operation = operation
+        self.inputs = inputs
+        self.outputs = outputs or []
+        self.segments = segments
+        self.params = params or {}
+        self.order = next(_op_order)
+        self.done = False
+
+class VikasFeature:
+    """Base class for all Vikas Editor features
+
+    The editor only needs `_is_vikas_feature`, `name`, execute(),
+    take_pending(), runs_on_frames(), build_filter() and an optional
+    flush(), so extension types can register without subclassing.
+    """
+    __slots__ = ("name", "config", "_pending_ops", "_logger")
+    _is_vikas_feature = True
+    
     def __init__(self, name):
         self.name = f"VIKAS {name}"
+        # The "[VIKAS ...]" prefix is added by the handler from the logger name, only for records it emits
+        self._logger = logging.getLogger(f"vikas.{self.name}")
         self.config = {}
+        self._pending_ops = []
         
-    @abstractmethod
     def execute(self, *args, **kwargs):
-        pass
+        raise NotImplementedError
         
     def configure(self, config):
         """Set configuration for this feature"""
         self.config.update(config)
-        print(f"[VIKAS] Configured {self.name} with settings: {config}")
+        self.log("Configured with settings: %s", config)
         
-    def log(self, message):
-        """Log a message with VIKAS prefix"""
-        print(f"[VIKAS] {message}")
+    def log(self, message, *args, level=logging.INFO):
+        """Log a message prefixed with the feature name; pass values as %-style args, not an f-string"""
+        self._logger.log(level, message, *args)
+        
+    def _queue(self, operation, inputs, outputs=None, segments=None, **params):
+        pending = PendingOperation(operation, inputs, outputs, segments, params)
+        self._pending_ops.append(pending)
+        return pending
+        
+    def __getstate__(self):
+        """Pickle the configuration only; queued operations stay with this process"""
+        state = dict(getattr(self, "__dict__", {}))
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        state["_pending_ops"] = []
+        return state
+        
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+        
+    def take_pending(self):
+        """Hand queued operations over to the editor's render session"""
+        ops, self._pending_ops = self._pending_ops, []
+        return ops
+        
+    def runs_on_frames(self, op):
+        """True if `op` is applied by process_frame(op, frame, t) on decoded RGB frames instead of a filter"""
+        return False
+        
+    def build_filter(self, op, src, dst, extra):
+        """Return this operation's filter_complex segment from label `src` to `dst`
+
+        `extra` holds the video labels of op.inputs[1:] (stickers, backgrounds).
+        """
+        raise NotImplementedError
 
 class EditFeature(VikasFeature):
     """VIKAS Editing Core"""
+    __slots__ = ("_timeline_buf", "_timeline_len", "timeline_sources", "_source_ids", "_op_count")
+    
     def __init__(self):
         super().__init__("Edit Core")
-        self.timeline = []
+        # Edited segments as int64 (start_ms, end_ms, source) rows, end_ms -1 for whole clips;
+        # `source` indexes timeline_sources. Capacity doubles on overflow
+        self._timeline_buf = np.empty((1024, 3), dtype=np.int64)
+        self._timeline_len = 0
+        self.timeline_sources = []
+        self._source_ids = {}
+        self._op_count = 0
+        
+    @property
+    def timeline(self):
+        """The recorded (start_ms, end_ms, source) rows; a view without the buffer's unused capacity"""
+        return self._timeline_buf[:self._timeline_len]
         
     def execute(self, operation, *args):
+        """Queue an edit; it is rendered together with all other edits by flush()"""
         if operation == "trim":
             return self._trim(*args)
         elif operation == "merge":
@@ -51,40 +502,199 @@ class EditFeature(VikasFeature):
         elif operation == "split":
             return self._split(*args)
         else:
-            self.log(f"Unknown edit operation: {operation}")
+            self.log("Unknown edit operation: %s", operation)
             return False
             
-    def _trim(self, video_path, start, end):
-        self.log(f"Trimming {video_path} from {start}s to {end}s")
-        # In a real implementation, we'd use FFmpeg here
-        return True
+    def _record(self, video_path, start=0, end=None):
+        """Append one segment of `video_path` to the timeline"""
+        if self._timeline_len == len(self._timeline_buf):
+            self._timeline_buf = np.concatenate((self._timeline_buf, np.empty_like(self._timeline_buf)))
+        source = self._source_ids.get(video_path)
+        if source is None:
+            source = self._source_ids[video_path] = len(self.timeline_sources)
+            self.timeline_sources.append(video_path)
+        self._timeline_buf[self._timeline_len] = (_to_ms(start), -1 if end is None else _to_ms(end), source)
+        self._timeline_len += 1
+        
+    def edits_after(self, seconds):
+        """Timeline rows of segments that end after `seconds` (whole clips always do)"""
+        rows = self.timeline
+        ends = rows[:, 1]
+        return rows[(ends < 0) | (ends > _to_ms(seconds))]
+        
+    def _output_path(self, video_path, suffix):
+        stem, ext = os.path.splitext(video_path)
+        self._op_count += 1
+        return f"{stem}_vikas_{suffix}{self._op_count}{ext or '.mp4'}"
+        
+    def _trim(self, video_path, start, end, output=None):
+        self.log("Trimming %s from %ss to %ss", video_path, start, end)
+        output = output or self._output_path(video_path, "trim")
+        self._record(video_path, start, end)
+        return self._queue("trim", [video_path], [output], [(start, end)])
         
     def _merge(self, videos, output):
-        self.log(f"Merging {len(videos)} videos into {output}")
-        return True
+        self.log("Merging %d videos into %s", len(videos), output)
+        for video in videos:
+            self._record(video)
+        return self._queue("merge", list(videos), [output])
         
     def _split(self, video_path, segments):
-        self.log(f"Splitting {video_path} into {len(segments)} segments")
+        """Split into one file per (start, end) segment"""
+        self.log("Splitting %s into %d segments", video_path, len(segments))
+        outputs = [self._output_path(video_path, "part") for _ in segments]
+        for start, end in segments:
+            self._record(video_path, start, end)
+        return self._queue("split", [video_path], outputs, list(segments))
+        
+    def _build_command(self, ops):
+        """Build one FFmpeg command with a filter_complex node per queued edit"""
+        with_audio = self.config.get("audio", True)
+        sources = []
+        uses = {}
+        for op in ops:
+            for path in op.inputs:
+                if path not in uses:
+                    sources.append(path)
+                    uses[path] = 0
+                uses[path] += len(op.segments) if op.segments else 1
+        
+        # Each source is decoded once; split/asplit fan it out to every edit using it
+        graph = []
+        labels = {}
+        for index, path in enumerate(sources):
+            count = uses[path]
+            if count == 1:
+                labels[path] = [(f"[{index}:v]", f"[{index}:a]")]
+                continue
+            video = "".join(f"[v{index}_{n}]" for n in range(count))
+            audio = "".join(f"[a{index}_{n}]" for n in range(count))
+            graph.append(f"[{index}:v]split={count}{video}")
+            if with_audio:
+                graph.append(f"[{index}:a]asplit={count}{audio}")
+            labels[path] = [(f"[v{index}_{n}]", f"[a{index}_{n}]") for n in range(count)]
+        
+        cmd = ["ffmpeg", "-y"]
+        for path in sources:
+            cmd += ["-i", path]
+        
+        maps = []
+        out = 0
+        for op in ops:
+            if op.operation == "merge":
+                streams = [labels[path].pop() for path in op.inputs]
+                pads = "".join(v + a if with_audio else v for v, a in streams)
+                graph.append(f"{pads}concat=n={len(streams)}:v=1:a={int(with_audio)}[vo{out}]"
+                             + (f"[ao{out}]" if with_audio else ""))
+                maps.append((out, op.outputs[0]))
+                out += 1
+                continue
+            for (start, end), output in zip(op.segments, op.outputs):
+                video, audio = labels[op.inputs[0]].pop()
+                # HH:MM:SS would split the filter's options at each ':'
+                start, end = _to_ms(start) / 1000, _to_ms(end) / 1000
+                graph.append(f"{video}trim=start={start}:end={end},setpts=PTS-STARTPTS[vo{out}]")
+                if with_audio:
+                    graph.append(f"{audio}atrim=start={start}:end={end},asetpts=PTS-STARTPTS[ao{out}]")
+                maps.append((out, output))
+                out += 1
+        
+        cmd += ["-filter_complex", ";".join(graph)]
+        for index, output in maps:
+            cmd += ["-map", f"[vo{index}]"]
+            if with_audio:
+                cmd += ["-map", f"[ao{index}]", "-c:a", "aac"]
+            cmd += ["-c:v", "libx264", output]
+        return cmd
+        
+    def flush(self, run_ffmpeg):
+        """Render all queued edits with a single FFmpeg call through the editor's run_ffmpeg"""
+        if not self._pending_ops:
+            return True
+        ops, self._pending_ops = self._pending_ops, []
+        
+        self.log("Rendering %d queued edits in one FFmpeg pass", len(ops))
+        if run_ffmpeg(self._build_command(ops)) is None:
+            # Keep the edits queued, ahead of any added since, so the next render retries them
+            self.log("Render failed; %d edits stay queued", len(ops), level=logging.ERROR)
+            self._pending_ops[:0] = ops
+            return False
+            
+        for op in ops:
+            op.done = True
         return True
 
 class TextFeature(VikasFeature):
     """VIKAS Text Overlay"""
+    __slots__ = ("fonts",)
+    
     def __init__(self):
         super().__init__("Text Overlay")
         self.fonts = ["Arial", "Vikas Sans", "Roboto", "Times New Roman"]
         
     def execute(self, video_path, text, position, style=None):
-        self.log(f"Adding text '{text}' to {video_path} at position {position}")
+        """Queue a text stage; it is drawn when the editor renders"""
+        self.log("Adding text '%s' to %s at position %s", text, video_path, position)
         if style:
-            self.log(f"Using custom style: {style}")
-        # Actual implementation would use FFmpeg filters
-        return True
+            self.log("Using custom style: %s", style)
+        return self._queue("text", [video_path], text=text, position=position, style=style or {})
+        
+    def runs_on_frames(self, op):
+        return _optional_module("PIL.ImageDraw") is not None
+        
+    @staticmethod
+    def _load_font(name, size):
+        from PIL import ImageFont
+        for candidate in ((name, f"{name}.ttf") if name else ()):
+            try:
+                return ImageFont.truetype(candidate, size)
+            except OSError:
+                continue
+        return ImageFont.load_default(size)
+        
+    def _render_text(self, op):
+        """Rasterize the text once into a premultiplied RGBA overlay"""
+        from PIL import Image, ImageDraw
+        style = op.params["style"]
+        font = self._load_font(style.get("font"), style.get("size", 48))
+        left, top, right, bottom = font.getbbox(op.params["text"])
+        image = Image.new("RGBA", (max(right - left, 1), max(bottom - top, 1)))
+        ImageDraw.Draw(image).text((-left, -top), op.params["text"], font=font, fill=style.get("color", "white"))
+        return _premultiply(np.array(image))
+        
+    def process_frame(self, op, frame, t):
+        if "overlay" not in op.params:
+            op.params["overlay"] = self._render_text(op)
+        rgba = op.params["overlay"]
+        x, y = _position_px(op.params["position"], frame.shape[1], frame.shape[0], rgba.shape[1], rgba.shape[0])
+        _composite(frame, rgba, x, y)
+        
+    def build_filter(self, op, src, dst, extra):
+        style = op.params["style"]
+        x, y = _position_xy(op.params["position"], "w", "h", "text_w", "text_h")
+        options = [
+            f"text={_escape_filter_value(op.params['text'])}",
+            "expansion=none",
+            f"fontcolor={_escape_filter_value(style.get('color', 'white'))}",
+            f"fontsize={style.get('size', 48)}",
+            f"x={_escape_filter_value(x)}",
+            f"y={_escape_filter_value(y)}",
+        ]
+        if "font" in style:
+            options.append(f"font={_escape_filter_value(style['font'])}")
+        return f"{src}drawtext={':'.join(options)}{dst}"
 
 class StickerFeature(VikasFeature):
     """VIKAS Sticker Animation"""
+    __slots__ = ("sticker_library", "_cache")
+    
     def __init__(self):
         super().__init__("Sticker Animation")
         self.sticker_library = self._load_stickers()
+        self._cache = {}
+        for path in self.sticker_library.values():
+            if os.path.isfile(path) and _optional_module("imageio.v3") is not None:
+                self._cache_sticker(path)
         
     def _load_stickers(self):
         return {
@@ -94,22 +704,102 @@ class StickerFeature(VikasFeature):
         }
         
     def execute(self, video_path, sticker_name, position, duration=None):
+        """Queue an overlay stage; it is composited when the editor renders"""
         if sticker_name not in self.sticker_library:
-            self.log(f"Sticker '{sticker_name}' not found in VIKAS library")
+            self.log("Sticker '%s' not found in VIKAS library", sticker_name)
             return False
             
-        self.log(f"Adding {sticker_name} to {video_path} at {position}")
+        sticker = self.sticker_library[sticker_name]
+        if os.path.isdir(sticker):
+            self.log("Sticker '%s' is a collection; pick a single sticker from %s", sticker_name, sticker)
+            return False
+        if not os.path.isfile(sticker):
+            self.log("Sticker file %s not found", sticker, level=logging.ERROR)
+            return False
+        # Decode now so an unreadable file fails here rather than mid-render
+        if sticker not in self._cache and _optional_module("imageio.v3") is not None:
+            try:
+                self._cache_sticker(sticker)
+            except Exception as e:
+                self.log("Could not decode sticker %s: %s", sticker, e, level=logging.ERROR)
+                return False
+            
+        self.log("Adding %s to %s at %s", sticker_name, video_path, position)
         if duration:
-            self.log(f"Sticker duration: {duration}s")
-        return True
+            self.log("Sticker duration: %ss", duration)
+        return self._queue("sticker", [video_path, sticker], position=position, duration=duration)
+        
+    def runs_on_frames(self, op):
+        return _optional_module("imageio.v3") is not None
+        
+    def _cache_sticker(self, path):
+        """Decode every frame of a sticker once into premultiplied RGBA, with each frame's end time in seconds"""
+        with _optional_module("imageio.v3").imopen(path, "r") as file:
+            frames = file.read(index=None, mode="RGBA")
+            if frames.ndim == 3:
+                frames = frames[None]
+            durations = [file.metadata(index=i).get("duration", 100) for i in range(len(frames))]
+        frames = _premultiply(np.ascontiguousarray(frames))
+        self._cache[path] = (frames, np.cumsum(durations) / 1000)
+        return self._cache[path]
+        
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_cache"] = {}  # batch workers map the shared atlas instead of unpickling copies
+        return state
+        
+    def share_cache(self):
+        """Copy every decoded sticker into one SharedMemory atlas; returns (block, layout) or (None, {})"""
+        if not self._cache:
+            return None, {}
+        from multiprocessing import shared_memory
+        block = shared_memory.SharedMemory(create=True, size=sum(frames.nbytes for frames, _ in self._cache.values()))
+        layout = {}
+        offset = 0
+        for path, (frames, ends) in self._cache.items():
+            np.ndarray(frames.shape, np.uint8, buffer=block.buf, offset=offset)[:] = frames
+            layout[path] = (offset, frames.shape, ends)
+            offset += frames.nbytes
+        return block, layout
+        
+    def attach_cache(self, buffer, layout):
+        """Use the frames of a share_cache() atlas in place"""
+        for path, (offset, shape, ends) in layout.items():
+            self._cache[path] = (np.ndarray(shape, np.uint8, buffer=buffer, offset=offset), ends)
+        
+    def process_frame(self, op, frame, t):
+        duration = op.params["duration"]
+        if duration and t > duration:
+            return
+        path = op.inputs[1]
+        frames, ends = self._cache.get(path) or self._cache_sticker(path)
+        # Animated stickers loop over the clip
+        index = min(int(np.searchsorted(ends, t % ends[-1], side="right")), len(frames) - 1)
+        rgba = frames[index]
+        x, y = _position_px(op.params["position"], frame.shape[1], frame.shape[0], rgba.shape[1], rgba.shape[0])
+        _composite(frame, rgba, x, y)
+        
+    def build_filter(self, op, src, dst, extra):
+        x, y = _position_xy(op.params["position"], "W", "H", "w", "h")
+        position = f"x={_escape_filter_value(x)}:y={_escape_filter_value(y)}"
+        duration = op.params["duration"]
+        if not duration:
+            return f"{src}{extra[0]}overlay={position}:shortest=1{dst}"
+        # Cut the looped sticker itself; the video passes through once it ends
+        sticker = f"[stk{op.order}]"
+        return (f"{extra[0]}trim=duration={duration}{sticker};"
+                f"{src}{sticker}overlay={position}:eof_action=pass{dst}")
 
 class SoundFeature(VikasFeature):
     """VIKAS Audio Processing"""
+    __slots__ = ("effects",)
+    
     def __init__(self):
         super().__init__("Audio Processing")
         self.effects = ["Echo", "Reverb", "Pitch Shift", "VIKAS Signature"]
         
     def execute(self, video_path, operation, params=None):
+        """Queue a sound operation; flush() renders all of them with one decode per video"""
         if operation == "add_music":
             return self._add_music(video_path, params)
         elif operation == "apply_effect":
@@ -117,148 +807,725 @@ class SoundFeature(VikasFeature):
         elif operation == "extract_audio":
             return self._extract_audio(video_path)
         else:
-            self.log(f"Unknown sound operation: {operation}")
+            self.log("Unknown sound operation: %s", operation)
             return False
             
     def _add_music(self, video_path, music_file):
-        self.log(f"Adding background music {music_file} to {video_path}")
-        return True
+        self.log("Adding background music %s to %s", music_file, video_path)
+        return self._queue("add_music", [video_path, music_file])
         
     def _apply_effect(self, video_path, effect):
         if effect not in self.effects:
-            self.log(f"Effect '{effect}' not available in VIKAS sound library")
+            self.log("Effect '%s' not available in VIKAS sound library", effect)
             return False
             
-        self.log(f"Applying {effect} effect to {video_path}")
-        return True
+        self.log("Applying %s effect to %s", effect, video_path)
+        return self._queue("apply_effect", [video_path], effect=effect)
         
     def _extract_audio(self, video_path):
-        self.log(f"Extracting audio from {video_path}")
+        self.log("Extracting audio from %s", video_path)
+        output = f"{os.path.splitext(video_path)[0]}_vikas_audio.wav"
+        return self._queue("extract_audio", [video_path], [output])
+        
+    def _process(self, audio, op, rate, run_ffmpeg):
+        """Run one queued operation on planar float32 audio, in place where possible"""
+        if op.operation == "add_music":
+            music = _decode_to_float32(run_ffmpeg, op.inputs[1], rate, audio.shape[0])
+            if music is None:
+                self.log("Could not decode music %s", op.inputs[1], level=logging.ERROR)
+                return audio
+            # Loop the track over the clip along the sample axis; np.resize would mix the channels
+            n, m = audio.shape[1], music.shape[1]
+            music = np.tile(music, (1, -(-n // m)))[:, :n]
+            audio += np.float32(self.config.get("music_volume", 0.5)) * music
+            return audio
+        if op.operation == "extract_audio":
+            self._write_wav(op.outputs[0], audio, rate)
+            return audio
+            
+        effect = op.params["effect"]
+        for channel in audio:
+            if effect in ("Echo", "VIKAS Signature"):
+                _echo_kernel(channel, max(1, int(rate * self.config.get("echo_delay", 0.25))),
+                             np.float32(self.config.get("echo_gain", 0.4)))
+            if effect in ("Reverb", "VIKAS Signature"):
+                _reverb_kernel(channel, rate, self.config.get("reverb_mix", 0.3))
+            if effect == "Pitch Shift":
+                _pitch_kernel(channel, self.config.get("pitch_ratio", 1.25), int(rate * 0.05))
+        return audio
+        
+    @staticmethod
+    def _write_wav(path, audio, rate):
+        pcm = (np.clip(audio.T, -1, 1) * 32767).astype("<i2")
+        import wave
+        with wave.open(path, "wb") as f:
+            f.setnchannels(audio.shape[0])
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes(pcm.tobytes())
+            
+    def flush(self, run_ffmpeg):
+        """Decode each video's audio once, apply its queued operations and mux it back with -c:v copy"""
+        ops = self.take_pending()
+        if not ops:
+            return True
+        _load_kernels()
+        rate = self.config.get("sample_rate", 44100)
+        channels = self.config.get("channels", 2)
+        by_video = {}
+        for op in ops:
+            by_video.setdefault(op.inputs[0], []).append(op)
+            
+        failed = []
+        for video_path, video_ops in by_video.items():
+            info = _probe_audio(video_path)
+            audio = None
+            if info is not None and info[0]:
+                audio = _decode_to_float32(run_ffmpeg, video_path, rate, channels)
+            elif info is not None and any(op.operation == "add_music" for op in video_ops):
+                # A silent video gets the music over a silent track of its length
+                audio = np.zeros((channels, round(info[1] * rate)), dtype=np.float32)
+            if audio is None:
+                self.log("No audio could be decoded from %s", video_path, level=logging.ERROR)
+                failed += video_ops
+                continue
+                
+            self.log("Processing %d sound operations on %s in one pass", len(video_ops), video_path)
+            for op in video_ops:
+                audio = self._process(audio, op, rate, run_ffmpeg)
+                
+            if any(op.operation != "extract_audio" for op in video_ops):
+                stem, ext = os.path.splitext(video_path)
+                output = f"{stem}_vikas_sound{ext or '.mp4'}"
+                pcm = np.clip(audio.T, -1, 1).astype(np.float32).tobytes()
+                cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", video_path,
+                       "-f", "f32le", "-ar", str(rate), "-ac", str(channels), "-i", "-",
+                       "-map", "0:v?", "-map", "1:a", "-c:v", "copy", "-c:a", "aac", output]
+                if run_ffmpeg(cmd, pcm) is None:
+                    failed += video_ops
+                    continue
+                for op in video_ops:
+                    if op.operation != "extract_audio":
+                        op.outputs = [output]
+                        # render() takes the audio of this file into the video's filter/frame session, if any
+                        op.params["audio_track"] = output
+                        
+            for op in video_ops:
+                op.done = True
+                
+        if failed:
+            # Like EditFeature.flush, keep failed operations queued so the next render retries them
+            self.log("%d sound operations failed and stay queued", len(failed), level=logging.ERROR)
+            self._pending_ops[:0] = failed
+            return False
         return True
 
 class EffectsFeature(VikasFeature):
     """VIKAS Visual Effects"""
+    __slots__ = ("filters",)
+    
     def __init__(self):
         super().__init__("Visual Effects")
         self.filters = self._load_filters()
         
     def _load_filters(self):
+        """Color grades map to (int8 matrix, int16 bias, tone LUT) applied on frames; None marks a spatial FFmpeg filter"""
         return {
-            "VIKAS Filter": 200,
-            "VIKAS Pro Filter": 400,
-            "VIKAS Zoom Effect": 100,
-            "VIKAS Background": 1500
+            "VIKAS Filter": (*_color_matrix(1.15, (1.06, 1.0, 0.92), (0, 0, 0)), _tone_lut(0.25)),
+            "VIKAS Pro Filter": (*_color_matrix(1.3, (1.1, 1.02, 0.9), (4, 0, -4)), _tone_lut(0.6)),
+            "VIKAS Zoom Effect": None,
+            "VIKAS Background": None
         }
         
     def execute(self, video_path, filter_name, intensity=1.0):
+        """Queue a filter stage; it is applied when the editor renders"""
         if filter_name not in self.filters:
-            self.log(f"Filter '{filter_name}' not available in VIKAS effects")
+            self.log("Filter '%s' not available in VIKAS effects", filter_name)
             return False
             
-        self.log(f"Applying {filter_name} to {video_path} with intensity {intensity}")
-        self.log(f"Using {self.filters[filter_name]} processing points")
-        return True
+        self.log("Applying %s to %s with intensity %s", filter_name, video_path, intensity)
+        grade = self.filters[filter_name]
+        if filter_name == "VIKAS Zoom Effect":
+            # The zoom crops back to the probed frame size so the output keeps its resolution
+            info = _probe_video(video_path)
+            if info is None:
+                self.log("Could not read the frame size of %s", video_path, level=logging.ERROR)
+                return False
+            return self._queue("effect", [video_path], filter_name=filter_name, intensity=intensity,
+                               size=info[:2])
+        if grade is None:
+            return self._queue("effect", [video_path], filter_name=filter_name, intensity=intensity)
+        self.log("Using the int8 color-matrix path")
+        matrix, bias = _scale_matrix(grade[0], grade[1], intensity)
+        return self._queue("effect", [video_path], filter_name=filter_name, intensity=intensity,
+                           matrix=matrix, bias=bias)
+        
+    def runs_on_frames(self, op):
+        return self.filters[op.params["filter_name"]] is not None
+        
+    def process_frame(self, op, frame, t):
+        _apply_matrix_int8(frame, op.params["matrix"], op.params["bias"], MATRIX_SHIFT)
+        lut = self.filters[op.params["filter_name"]][2]
+        _apply_filter_kernel(frame, lut, np.float32(op.params["intensity"]))
+        
+    def build_filter(self, op, src, dst, extra):
+        i = float(op.params["intensity"])
+        if op.params["filter_name"] == "VIKAS Zoom Effect":
+            zoom = 1 + 0.2 * i
+            width, height = op.params["size"]
+            chain = (f"scale=ceil({width}*{zoom:.3f}/2)*2:ceil({height}*{zoom:.3f}/2)*2,"
+                     f"crop={width}:{height}")
+        else:
+            chain = f"vignette=angle={min(0.6 * i, 1.5):.3f}"
+        return f"{src}{chain}{dst}"
 
 class BackgroundFeature(VikasFeature):
     """VIKAS Background Changer"""
+    __slots__ = ("methods", "has_cuda")
+    
     def __init__(self):
         super().__init__("Background Changer")
         self.methods = ["Chroma Key", "AI Segmentation", "Manual Masking"]
+        filters = _ffmpeg_capabilities("-filters")
+        self.has_cuda = ("cuda" in _hwaccels()
+                         and "chromakey_cuda" in filters and "overlay_cuda" in filters
+                         and "h264_nvenc" in _ffmpeg_capabilities("-encoders")
+                         and _cuda_device_works())
         
     def execute(self, video_path, background, method="AI Segmentation"):
+        """Queue a key-and-composite stage; it is applied when the editor renders"""
         if method not in self.methods:
-            self.log(f"Method '{method}' not supported by VIKAS background changer")
+            self.log("Method '%s' not supported by VIKAS background changer", method)
             return False
             
-        self.log(f"Changing background of {video_path} to {background} using {method}")
-        return True
+        inputs = [video_path, background]
+        if method == "Manual Masking":
+            if "mask" not in self.config:
+                self.log("Manual Masking needs a 'mask' image in the feature config")
+                return False
+            inputs.append(self.config["mask"])
+        elif method == "AI Segmentation":
+            self.log("No segmentation model bundled; keying the configured color instead")
+            
+        info = _probe_video(video_path)
+        if info is None:
+            self.log("Could not read the frame size of %s", video_path, level=logging.ERROR)
+            return False
+            
+        self.log("Changing background of %s to %s using %s", video_path, background, method)
+        cuda = self.has_cuda and method != "Manual Masking"
+        return self._queue("background", inputs, method=method, size=info[:2], cuda=cuda)
+        
+    def _key_options(self):
+        """color:similarity:blend for colorkey and chromakey_cuda; both paths share these defaults"""
+        color = self.config.get("key_color", "0x00ff00")
+        similarity = self.config.get("similarity", 0.3)
+        blend = self.config.get("blend", 0.1)
+        return f"{color}:{similarity}:{blend}"
+        
+    def build_filter(self, op, src, dst, extra):
+        n = op.order
+        scale = "scale={}:{},setsar=1".format(*op.params["size"])
+        # Scale the background to the video frame, then key the subject over it
+        graph = [f"{extra[0]}{scale}[bg{n}]"]
+        if op.params["method"] == "Manual Masking":
+            graph.append(f"{extra[1]}{scale},format=gray[alpha{n}]")
+            graph.append(f"{src}[alpha{n}]alphamerge=shortest=1[fg{n}]")
+        else:
+            graph.append(f"{src}colorkey={self._key_options()}[fg{n}]")
+        graph.append(f"[bg{n}][fg{n}]overlay=shortest=1,format=yuv420p{dst}")
+        return ";".join(graph)
+        
+    def build_cuda_filter(self, op, src, dst, extra):
+        """Key and composite on CUDA frames; only the background image is uploaded"""
+        n = op.order
+        scale = "scale={}:{},setsar=1".format(*op.params["size"])
+        return (f"{extra[0]}{scale},format=yuv420p,hwupload_cuda[bg{n}];"
+                f"{src}chromakey_cuda={self._key_options()}[fg{n}];"
+                f"[bg{n}][fg{n}]overlay_cuda=shortest=1{dst}")
 
 class VikasEditor:
     """Main VIKAS Video Editor Class"""
-    def __init__(self):
+    __slots__ = ("_features", "_feature_ids", "_dispatch", "project", "_timeline_assets", "_timeline_len", "_timeline_ts",
+                 "max_concurrent_ffmpeg", "_ffmpeg_sem", "_ffmpeg_bin")
+    
+    def __init__(self, max_concurrent_ffmpeg=None):
         print(VIKAS_LOGO)
-        self.features = {}
-        self.project = {"name": "Untitled", "created": datetime.now()}
+        # x264 already spreads one encode over most cores, so only a few FFmpeg processes run at once
+        self.max_concurrent_ffmpeg = max_concurrent_ffmpeg or max(1, (os.cpu_count() or 1) // 4)
+        self._ffmpeg_sem = threading.BoundedSemaphore(self.max_concurrent_ffmpeg)
+        # Commands keep "ffmpeg" as argv[0]; this absolute path is what gets executed
+        self._ffmpeg_bin = _resolve_tool("ffmpeg")
+        self._features = []
+        self._feature_ids = MappingProxyType({})
+        self._dispatch = []
+        self.project = {"name": "Untitled", "created": time.time_ns()}
+        self._reset_timeline()
         self._initialize_core_features()
         
+    def __getstate__(self):
+        """Batch workers get the features and project; the timeline stays with this editor"""
+        return {"features": self._features, "project": self.project,
+                "max_concurrent_ffmpeg": self.max_concurrent_ffmpeg}
+        
+    def __setstate__(self, state):
+        self.max_concurrent_ffmpeg = state["max_concurrent_ffmpeg"]
+        self._ffmpeg_sem = threading.BoundedSemaphore(self.max_concurrent_ffmpeg)
+        self._ffmpeg_bin = _resolve_tool("ffmpeg")
+        self._features = state["features"]
+        self._feature_ids = MappingProxyType({feature.name: i for i, feature in enumerate(self._features)})
+        self._dispatch = [feature.execute for feature in self._features]
+        self.project = state["project"]
+        self._reset_timeline()
+        
     def _initialize_core_features(self):
-        """Register all core VIKAS features"""
+        """Register all core VIKAS features, in FeatureId order"""
         self.register_feature(EditFeature())
         self.register_feature(TextFeature())
         self.register_feature(StickerFeature())
         self.register_feature(SoundFeature())
         self.register_feature(EffectsFeature())
         self.register_feature(BackgroundFeature())
-        print("[VIKAS] Core features initialized")
+        _LOG.info("[VIKAS] Core features initialized")
+        
+    @property
+    def features(self):
+        """Features keyed by their "VIKAS ..." name"""
+        return {feature.name: feature for feature in self._features}
         
     def register_feature(self, feature):
-        """Register a new feature with the VIKAS editor"""
-        if not isinstance(feature, VikasFeature):
-            raise TypeError("Only VikasFeature instances can be registered")
+        """Register a new feature with the VIKAS editor and return its id"""
+        if not getattr(feature, "_is_vikas_feature", False):
+            raise TypeError("Only VIKAS features can be registered")
             
-        self.features[feature.name] = feature
-        print(f"[VIKAS] Registered feature: {feature.name}")
+        index = self._feature_ids.get(feature.name)
+        # Bound execute methods are resolved once here, so execute_feature is one index and a call
+        if index is None:
+            index = len(self._features)
+            self._features.append(feature)
+            self._dispatch.append(feature.execute)
+        else:
+            self._features[index] = feature
+            self._dispatch[index] = feature.execute
+        # Name lookups are the legacy path; swap in a new read-only map rather than mutating it
+        self._feature_ids = MappingProxyType({**self._feature_ids, feature.name: index})
+        _LOG.info("[VIKAS] Registered feature: %s", feature.name)
+        return index
         
-    def execute_feature(self, feature_name, *args, **kwargs):
-        """Execute a feature by name"""
-        if feature_name not in self.features:
-            print(f"[VIKAS] Feature '{feature_name}' not found")
-            return False
+    def _get_feature(self, feature_id):
+        """Resolve a FeatureId, int index or legacy "VIKAS ..." name to a feature, or None"""
+        if isinstance(feature_id, str):
+            feature_id = self._feature_ids.get(feature_id)
+            if feature_id is None:
+                return None
+        try:
+            if feature_id < 0:
+                return None  # would wrap around to the last features
+            return self._features[feature_id]
+        except (IndexError, TypeError):
+            return None
+        
+    def execute_feature(self, feature_id, *args, **kwargs):
+        """Execute a feature by FeatureId, index or name"""
+        try:
+            # A negative id would wrap around; names fail the comparison with TypeError
+            if feature_id < 0:
+                raise IndexError(feature_id)
+            execute = self._dispatch[feature_id]
+        except (IndexError, TypeError):
+            index = self._feature_ids.get(feature_id)
+            if index is None:
+                _LOG.warning("[VIKAS] Feature '%s' not found", feature_id)
+                return False
+            execute = self._dispatch[index]
+            
+        return execute(*args, **kwargs)
+        
+    def execute_batch(self, jobs):
+        """Run (feature_id, args, kwargs) jobs and render them, one worker process per source video
+
+        Jobs on the same video run in order in one worker, which owns that
+        video's FFmpeg processes; up to max_concurrent_ffmpeg videos render
+        in parallel.
+        Returns each job's result in order, False for jobs that failed.
+        """
+        groups = {}
+        for index, (feature_id, args, kwargs) in enumerate(jobs):
+            feature = self._get_feature(feature_id)
+            if feature is None:
+                _LOG.warning("[VIKAS] Feature '%s' not found", feature_id)
+                continue
+            # Edits name the operation first; a merge is keyed by its first clip
+            video = args[1] if isinstance(feature, EditFeature) else args[0]
+            if isinstance(video, (list, tuple)):
+                video = video[0]
+            groups.setdefault(video, []).append((index, (feature_id, args, kwargs)))
             
-        return self.features[feature_name].execute(*args, **kwargs)
+        results = [False] * len(jobs)
+        if not groups:
+            return results
+        block, layout = self._features[FeatureId.STICKER].share_cache()
+        # Each worker runs one FFmpeg job at a time, so this also bounds FFmpeg processes across workers
+        workers = min(self.max_concurrent_ffmpeg, 16, len(groups))
+        _LOG.info("[VIKAS] Rendering %d videos on %d worker processes", len(groups), workers)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {video: pool.submit(_run_batch_group, self, [job for _, job in group],
+                                              block and block.name, layout)
+                           for video, group in groups.items()}
+                for video, future in futures.items():
+                    try:
+                        group_results = future.result()
+                    except Exception as e:
+                        _LOG.error("[VIKAS] Batch worker for %s failed: %s", video, e)
+                        continue
+                    for (index, _), result in zip(groups[video], group_results):
+                        results[index] = result
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+        return results
         
-    def configure_feature(self, feature_name, config):
+    def configure_feature(self, feature_id, config):
         """Configure a feature"""
-        if feature_name not in self.features:
-            print(f"[VIKAS] Feature '{feature_name}' not found")
+        feature = self._get_feature(feature_id)
+        if feature is None:
+            _LOG.warning("[VIKAS] Feature '%s' not found", feature_id)
             return False
             
-        self.features[feature_name].configure(config)
+        feature.configure(config)
         return True
         
     def list_features(self):
         """List all available features"""
         print("\nVIKAS Available Features:")
-        for name, feature in self.features.items():
-            print(f"- {name}")
-        return list(self.features.keys())
+        for feature in self._features:
+            print(f"- {feature.name}")
+        return [feature.name for feature in self._features]
         
     def create_project(self, name):
         """Create a new VIKAS project"""
+        now = time.time_ns()
         self.project = {
             "name": name,
-            "created": datetime.now(),
-            "modified": datetime.now(),
+            "created": now,
+            "modified": now,
             "features_used": []
         }
-        print(f"[VIKAS] Created new project: {name}")
+        self._reset_timeline()
+        _LOG.info("[VIKAS] Created new project: %s", name)
+        
+    def _reset_timeline(self, assets=(), timestamps=()):
+        """Timeline as parallel arrays: asset names and int64 ns timestamps (capacity doubles on overflow)"""
+        self._timeline_assets = list(assets)
+        self._timeline_len = len(self._timeline_assets)
+        self._timeline_ts = np.empty(max(1024, self._timeline_len), dtype=np.int64)
+        self._timeline_ts[:self._timeline_len] = timestamps
+        
+    def _project_snapshot(self):
+        """The project dict with the timeline packed as one asset list and one int64 array"""
+        project = dict(self.project)
+        if self._timeline_len:
+            project["timeline"] = {
+                "assets": self._timeline_assets,
+                "timestamps": self._timeline_ts[:self._timeline_len]
+            }
+        return project
         
     def save_project(self, path):
         """Save the current VIKAS project"""
-        with open(path, 'w') as f:
-            json.dump(self.project, f, default=str)
-        print(f"[VIKAS] Project saved to {path}")
+        project = self._project_snapshot()
+        orjson = _optional_module("orjson")
+        if orjson is not None:
+            data = orjson.dumps(project, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            import json
+            data = json.dumps(project, default=_json_default).encode()
+        with open(path, 'wb') as f:
+            f.write(data)
+        _LOG.info("[VIKAS] Project saved to %s", path)
         
     def load_project(self, path):
         """Load a VIKAS project"""
-        with open(path, 'r') as f:
-            self.project = json.load(f)
-        print(f"[VIKAS] Project loaded: {self.project['name']}")
+        with open(path, 'rb') as f:
+            data = f.read()
+        orjson = _optional_module("orjson")
+        if orjson is not None:
+            project = orjson.loads(data)
+        else:
+            import json
+            project = json.loads(data)
+        self.project = _revive_timestamps(project)
+        timeline = self.project.pop("timeline", None)
+        if isinstance(timeline, dict):
+            self._reset_timeline(timeline["assets"], timeline["timestamps"])
+        elif timeline:
+            # Projects saved before the packed layout store a list of {"asset", "timestamp"} dicts
+            self._reset_timeline([entry["asset"] for entry in timeline],
+                                 [_to_ns(entry["timestamp"]) for entry in timeline])
+        else:
+            self._reset_timeline()
+        _LOG.info("[VIKAS] Project loaded: %s (created %s)", self.project["name"],
+                  self._fmt_ts(self.project.get("created")))
+        
+    @staticmethod
+    def _fmt_ts(ns):
+        """ISO local time for a ns timestamp; timestamps stay ints until they are displayed"""
+        if ns is None:
+            return "unknown"
+        return datetime.fromtimestamp(ns / 1e9).isoformat()
+        
+    def render(self):
+        """Render queued operations of every feature that supports deferred rendering
+
+        Edits and sound render through their own flush(). Every other queued
+        stage is grouped by source video and chained into one filter graph,
+        so each source is decoded and encoded once however many features
+        touch it. A video whose sound was also processed is read from the
+        sound flush's output, so the session output carries both.
+        """
+        success = True
+        session = {}
+        flushed = []
+        for feature in self._features:
+            flush = getattr(feature, "flush", None)
+            if flush is not None:
+                flushed += getattr(feature, "_pending_ops", ())
+                if not flush(self._run_ffmpeg):
+                    success = False
+                continue
+            for op in feature.take_pending():
+                session.setdefault(op.inputs[0], []).append((feature, op))
+                
+        audio_ops = {}
+        for op in flushed:
+            if op.done and "audio_track" in op.params and op.inputs[0] in session:
+                audio_ops.setdefault(op.inputs[0], []).append(op)
+        for video_path, stages in session.items():
+            stages.sort(key=lambda stage: stage[1].order)
+            if not self._render_session(video_path, stages, audio_ops.get(video_path, ())):
+                success = False
+        _LOG.log(logging.INFO if success else logging.ERROR, "[VIKAS] Render %s", "completed" if success else "failed")
+        return success
+        
+    @staticmethod
+    def _filter_chain(stages, label, index, cuda=False):
+        """Chain filter stages from `label`; extra inputs are numbered from `index`
+
+        Returns (input arguments, graph segments, output label).
+        """
+        args = []
+        graph = []
+        for feature, op in stages:
+            extra = []
+            for path in op.inputs[1:]:
+                args += _looped_input(path)
+                extra.append(f"[{index}:v]")
+                index += 1
+            dst = f"[s{op.order}]"
+            build = feature.build_cuda_filter if cuda else feature.build_filter
+            graph.append(build(op, label, dst, extra))
+            label = dst
+        return args, graph, label
+        
+    def _render_session(self, video_path, stages, audio_ops=()):
+        """Apply all stages queued on one video, decoding and encoding it once
+
+        `audio_ops` are rendered sound operations on the video; their output
+        (the same video stream with processed audio) is read instead, and is
+        removed once the session output replaces it.
+        """
+        stem, ext = os.path.splitext(video_path)
+        output = f"{stem}_vikas{ext or '.mp4'}"
+        track = audio_ops[0].params["audio_track"] if audio_ops else None
+        video_path = track or video_path
+        _LOG.info("[VIKAS] Rendering %d stages on %s in one FFmpeg pass", len(stages), video_path)
+        
+        frame_stages = [stage for stage in stages if stage[0].runs_on_frames(stage[1])]
+        if frame_stages:
+            success = self._render_frames(video_path, stages, frame_stages, output)
+        else:
+            cuda = all(op.params.get("cuda") for _, op in stages)
+            success = False
+            if cuda:
+                # Decode, key, composite and encode without frames leaving GPU memory
+                args, graph, label = self._filter_chain(stages, "[0:v]", 1, cuda=True)
+                success = self._run_ffmpeg(["ffmpeg", "-y", "-hwaccel", "cuda", "-hwaccel_output_format", "cuda",
+                                            "-i", video_path, *args,
+                                            "-filter_complex", ";".join(graph), "-map", label, "-map", "0:a?",
+                                            "-c:v", "h264_nvenc", "-preset", "p4", "-c:a", "copy", output]) is not None
+            if not success:
+                if cuda:
+                    _LOG.warning("[VIKAS] CUDA render of %s failed; retrying on the CPU", video_path)
+                args, graph, label = self._filter_chain(stages, "[0:v]", 1)
+                success = self._run_ffmpeg(["ffmpeg", "-y", "-i", video_path, *args,
+                                            "-filter_complex", ";".join(graph), "-map", label, "-map", "0:a?",
+                                            "-c:v", "libx264", "-c:a", "copy", output]) is not None
+        if not success:
+            return False
+            
+        for _, op in stages:
+            op.outputs = [output]
+            op.done = True
+        for op in audio_ops:
+            op.outputs = [output]
+        if track:
+            os.remove(track)
+        _LOG.info("[VIKAS] Rendered %s", output)
+        return True
+        
+    def _run_ffmpeg(self, cmd, input=None):
+        """Run one FFmpeg command once a concurrency slot is free; returns its stdout, or None if it failed
+
+        Every decode, render and mux of the editor and its features goes through
+        here (_render_frames takes the same slot). The short ffprobe and
+        capability probes (_probe_video, _probe_audio, _ffmpeg_capabilities,
+        _cuda_device_works) run directly, outside the cap.
+        """
+        with self._ffmpeg_sem:
+            try:
+                result = subprocess.run(cmd, executable=self._ffmpeg_bin, input=input, capture_output=True)
+            except OSError as e:
+                _LOG.error("[VIKAS] FFmpeg could not be started: %s", e)
+                return None
+        if result.returncode != 0:
+            _LOG.error("[VIKAS] FFmpeg failed: %s", result.stderr.decode(errors="replace").strip()[-500:])
+            return None
+        return result.stdout
+        
+    def _render_frames(self, video_path, stages, frame_stages, output):
+        """Pipe raw RGB frames through the frame stages between a decoder and an encoder
+
+        Filter stages queued before the first frame stage run in the decoder's
+        graph, the rest in the encoder's graph.
+        """
+        info = _probe_video(video_path)
+        if info is None:
+            _LOG.error("[VIKAS] Could not read the frame size of %s", video_path)
+            return False
+        width, height, frame_rate = info
+        _load_kernels()
+        
+        first = stages.index(frame_stages[0])
+        before = stages[:first]
+        after = [stage for stage in stages[first:] if stage not in frame_stages]
+        
+        args, graph, label = self._filter_chain(before, "[0:v]", 1)
+        graph.append(f"{label}scale={width}:{height},format=rgb24[dec]")
+        decode = ["ffmpeg", "-loglevel", "error", "-i", video_path, *args,
+                  "-filter_complex", ";".join(graph), "-map", "[dec]",
+                  "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+        
+        args, graph, label = self._filter_chain(after, "[0:v]", 2)
+        encode = ["ffmpeg", "-y", "-loglevel", "error",
+                  "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+                  "-framerate", frame_rate, "-i", "-", "-i", video_path, *args]
+        if graph:
+            encode += ["-filter_complex", ";".join(graph), "-map", label]
+        else:
+            encode += ["-map", "0:v"]
+        encode += ["-map", "1:a?", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "copy", output]
+        
+        import tempfile
+        # A decoder/encoder pair takes one FFmpeg slot. stderr goes to temp files:
+        # a pipe nobody reads fills up on a noisy decode and stalls the frame loop
+        with self._ffmpeg_sem, tempfile.TemporaryFile() as decoder_log, tempfile.TemporaryFile() as encoder_log:
+            processes = []
+            try:
+                processes.append(("decoder", subprocess.Popen(decode, executable=self._ffmpeg_bin, bufsize=1 << 20,
+                                                              stdout=subprocess.PIPE, stderr=decoder_log)))
+                processes.append(("encoder", subprocess.Popen(encode, executable=self._ffmpeg_bin, bufsize=1 << 20,
+                                                              stdin=subprocess.PIPE, stderr=encoder_log)))
+                decoder, encoder = processes[0][1], processes[1][1]
+                
+                # One reusable buffer; the numpy view lets frame stages work on it in place
+                buffer = bytearray(width * height * 3)
+                frame = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3)
+                fps = float(Fraction(frame_rate))
+                index = 0
+                try:
+                    while _read_frame(decoder.stdout, buffer):
+                        t = index / fps
+                        for feature, op in frame_stages:
+                            feature.process_frame(op, frame, t)
+                        encoder.stdin.write(buffer)
+                        index += 1
+                except BrokenPipeError:
+                    decoder.kill()
+                finally:
+                    try:
+                        encoder.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                
+                decoder.wait()
+                encoder.wait()
+            except OSError as e:
+                _LOG.error("[VIKAS] FFmpeg could not be started: %s", e)
+                return False
+            finally:
+                # Reached with processes still running only if a frame stage raised
+                for _, process in processes:
+                    if process.poll() is None:
+                        process.kill()
+                        process.wait()
+                    if process.stdout is not None:
+                        process.stdout.close()
+                    
+            for (name, process), log in ((processes[1], encoder_log), (processes[0], decoder_log)):
+                if process.returncode != 0:
+                    log.seek(0)
+                    error = log.read().decode(errors="replace").strip()
+                    _LOG.error("[VIKAS] FFmpeg %s failed: %s", name, error[-500:])
+                    return False
+        return True
         
     def get_project_info(self):
         """Get information about the current project"""
-        return self.project
+        return self._project_snapshot()
         
     def add_to_timeline(self, asset):
         """Add an asset to the VIKAS timeline"""
-        if "timeline" not in self.project:
-            self.project["timeline"] = []
+        if self._timeline_len == len(self._timeline_ts):
+            grown = np.empty(2 * len(self._timeline_ts), dtype=np.int64)
+            grown[:self._timeline_len] = self._timeline_ts
+            self._timeline_ts = grown
             
-        self.project["timeline"].append({
-            "asset": asset,
-            "timestamp": datetime.now()
-        })
-        print(f"[VIKAS] Added {asset} to timeline")
+        # Keep timestamps non-decreasing so range queries can binary-search them
+        now = time.time_ns()
+        if self._timeline_len:
+            now = max(now, int(self._timeline_ts[self._timeline_len - 1]))
+        self._timeline_ts[self._timeline_len] = now
+        self._timeline_len += 1
+        self._timeline_assets.append(asset)
+        _LOG.info("[VIKAS] Added %s to timeline", asset)
+        
+    def assets_in_range(self, start, end):
+        """Assets added between `start` and `end` (ns since the epoch or datetimes), inclusive"""
+        timestamps = self._timeline_ts[:self._timeline_len]
+        first = np.searchsorted(timestamps, _to_ns(start), side="left")
+        last = np.searchsorted(timestamps, _to_ns(end), side="right")
+        return self._timeline_assets[first:last]
+
+def _run_batch_group(editor, jobs, atlas, layout):
+    """execute_batch() worker: run one video's jobs on the unpickled editor and render them"""
+    block = None
+    sticker = editor._features[FeatureId.STICKER]
+    if atlas:
+        from multiprocessing import shared_memory
+        block = shared_memory.SharedMemory(name=atlas)
+        sticker.attach_cache(block.buf, layout)
+    try:
+        results = [editor.execute_feature(feature_id, *args, **kwargs) for feature_id, args, kwargs in jobs]
+        if not editor.render():
+            results = [result if isinstance(result, PendingOperation) and result.done else False
+                       for result in results]
+        return results
+    finally:
+        if block is not None:
+            sticker._cache.clear()  # drop the views before unmapping the atlas
+            block.close()
 
 # Example usage of the VIKAS Video Editor
 if __name__ == "__main__":
@@ -274,37 +1541,19 @@ if __name__ == "__main__":
     # Add a video to the timeline
     vikas_editor.add_to_timeline("beach.mp4")
     
-    # Apply a VIKAS filter
-    vikas_editor.execute_feature(
-        "VIKAS Visual Effects", 
-        "beach.mp4", 
-        "VIKAS Pro Filter", 
-        intensity=0.8
-    )
-    
-    # Add text with VIKAS
-    vikas_editor.execute_feature(
-        "VIKAS Text Overlay",
-        "beach.mp4",
-        "Vacation 2023",
-        position="top-center",
-        style={"color": "white", "font": "Vikas Sans"}
-    )
-    
-    # Add a VIKAS sticker
-    vikas_editor.execute_feature(
-        "VIKAS Sticker Animation",
-        "beach.mp4",
-        "VIKAS Logo",
-        position="bottom-right"
-    )
-    
-    # Change background with VIKAS technology
-    vikas_editor.execute_feature(
-        "VIKAS Background Changer",
-        "beach.mp4",
-        "sunset.jpg"
-    )
+    # Queue a filter, text, a sticker and a background change on the clip;
+    # execute_batch renders each source video in its own worker process
+    vikas_editor.execute_batch([
+        # Apply a VIKAS filter
+        (FeatureId.EFFECTS, ("beach.mp4", "VIKAS Pro Filter"), {"intensity": 0.8}),
+        # Add text with VIKAS
+        (FeatureId.TEXT, ("beach.mp4", "Vacation 2023"),
+         {"position": "top-center", "style": {"color": "white", "font": "Vikas Sans"}}),
+        # Add a VIKAS sticker
+        (FeatureId.STICKER, ("beach.mp4", "VIKAS Logo"), {"position": "bottom-right"}),
+        # Change background with VIKAS technology
+        (FeatureId.BACKGROUND, ("beach.mp4", "sunset.jpg"), {}),
+    ])
     
     # Save the project
     vikas_editor.save_project("my_vacation.vikas")